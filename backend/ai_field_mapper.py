@@ -16,11 +16,16 @@ import os
 import sys
 import json
 import logging
-import difflib
 import re
 from typing import Dict, List, Tuple, Optional, Set, Any
 from dataclasses import dataclass
 
+# Use the C implementation of difflib when it is installed
+try:
+    import cydifflib as difflib
+except ImportError:
+    import difflib
+
 # Import our enhanced PDF handler
 from enhanced_pdf_handler import PDFAnalyzer
 
@@ -175,6 +180,8 @@ class AIFieldMapper:
         self.pdf_analyzer = PDFAnalyzer(pdf_path)
         self.pdf_fields = self.pdf_analyzer.get_field_names()
         self.min_score = min_score
+        # Normalized PDF field names, computed once for all matching passes
+        self.normalized_pdf_fields = {f: self._normalize_field_name(f) for f in self.pdf_fields}
         self.field_mapping = {}  # Will be populated when generate_mapping is called
         self.checkbox_fields = {}  # Will hold checkbox fields and their mapping
         
@@ -238,7 +245,7 @@ class AIFieldMapper:
         
         # Create normalized versions of PDF fields
         normalized_pdf_fields = {
-            self._normalize_field_name(f): f for f in self.pdf_fields
+            norm: f for f, norm in self.normalized_pdf_fields.items()
         }
         
         # Check for exact matches
@@ -262,6 +269,7 @@ class AIFieldMapper:
         """Find fuzzy matches based on string similarity"""
         matches = {}
         available_pdf_fields = [f for f in self.pdf_fields if f not in excluded_targets]
+        available_norms = [self.normalized_pdf_fields[f] for f in available_pdf_fields]
         
         for ext_field in extracted_fields:
             norm_ext = self._normalize_field_name(ext_field)
@@ -269,7 +277,7 @@ class AIFieldMapper:
             # Get the closest match
             closest_matches = difflib.get_close_matches(
                 norm_ext, 
-                [self._normalize_field_name(f) for f in available_pdf_fields],
+                available_norms,
                 n=1,
                 cutoff=self.min_score
             )
@@ -278,8 +286,8 @@ class AIFieldMapper:
                 closest_norm = closest_matches[0]
                 
                 # Find the original field name
-                for pdf_field in available_pdf_fields:
-                    if self._normalize_field_name(pdf_field) == closest_norm:
+                for pdf_field, norm_pdf in zip(available_pdf_fields, available_norms):
+                    if norm_pdf == closest_norm:
                         # Compute similarity score
                         score = difflib.SequenceMatcher(None, norm_ext, closest_norm).ratio()
                         
@@ -293,6 +301,19 @@ class AIFieldMapper:
                         
         return matches
     
+    def _can_improve(self, score_bound: float, best_score: float) -> bool:
+        """
+        Check whether a score with this upper bound could still become the best match
+        
+        Args:
+            score_bound: Upper bound of the candidate's score
+            best_score: Score of the best match found so far
+            
+        Returns:
+            False if the candidate can be skipped without computing its score
+        """
+        return score_bound > best_score and score_bound >= self.min_score
+    
     def _get_semantic_matches(self, 
                            extracted_fields: List[str], 
                            excluded_targets: Set[str]) -> Dict[str, FieldMatch]:
@@ -303,7 +324,7 @@ class AIFieldMapper:
         # Build synonym dictionary for PDF fields
         pdf_field_synonyms = {}
         for pdf_field in available_pdf_fields:
-            norm_field = self._normalize_field_name(pdf_field)
+            norm_field = self.normalized_pdf_fields[pdf_field]
             pdf_field_synonyms[pdf_field] = [norm_field]
             
             # Add common synonyms
@@ -315,7 +336,7 @@ class AIFieldMapper:
         # Add form field patterns recognition
         pdf_field_categories = {}
         for pdf_field in available_pdf_fields:
-            norm_field = self._normalize_field_name(pdf_field)
+            norm_field = self.normalized_pdf_fields[pdf_field]
             # Categorize fields based on patterns
             for category, patterns in FORM_FIELD_PATTERNS.items():
                 if any(pattern in norm_field for pattern in patterns):
@@ -332,10 +353,15 @@ class AIFieldMapper:
             # First try direct semantic matching with synonyms
             for pdf_field, synonyms in pdf_field_synonyms.items():
                 for synonym in synonyms:
-                    if (synonym in norm_ext or norm_ext in synonym or 
-                        difflib.SequenceMatcher(None, norm_ext, synonym).ratio() > 0.7):
-                        # Calculate a score based on the similarity
-                        score = difflib.SequenceMatcher(None, norm_ext, synonym).ratio()
+                    # The score is the ratio, so skip pairs whose cheap upper bounds can't win
+                    matcher = difflib.SequenceMatcher(None, norm_ext, synonym)
+                    if (not self._can_improve(matcher.real_quick_ratio(), best_score) or
+                        not self._can_improve(matcher.quick_ratio(), best_score)):
+                        continue
+                    
+                    # Calculate a score based on the similarity
+                    score = matcher.ratio()
+                    if synonym in norm_ext or norm_ext in synonym or score > 0.7:
                         if score > best_score and score >= self.min_score:
                             best_score = score
                             best_match = pdf_field
@@ -357,15 +383,19 @@ class AIFieldMapper:
                             for concept, variations in FIELD_SYNONYMS.items():
                                 if concept in norm_ext or any(var in norm_ext for var in variations):
                                     # Get the normalized PDF field name for comparison
-                                    norm_pdf = self._normalize_field_name(pdf_field)
+                                    norm_pdf = self.normalized_pdf_fields[pdf_field]
                                     
                                     # Check if this concept appears in the PDF field
                                     if (concept in norm_pdf or 
                                         any(var in norm_pdf for var in variations)):
                                         
                                         # Calculate a score that factors in the category match
-                                        base_score = difflib.SequenceMatcher(None, norm_ext, norm_pdf).ratio()
+                                        matcher = difflib.SequenceMatcher(None, norm_ext, norm_pdf)
                                         category_bonus = 0.2  # Bonus for matching category
+                                        if (not self._can_improve(min(1.0, matcher.real_quick_ratio() + category_bonus), best_score) or
+                                            not self._can_improve(min(1.0, matcher.quick_ratio() + category_bonus), best_score)):
+                                            continue
+                                        base_score = matcher.ratio()
                                         total_score = min(1.0, base_score + category_bonus)
                                         
                                         if total_score > best_score and total_score >= self.min_score:
@@ -410,7 +440,7 @@ class AIFieldMapper:
                 for value_key, checked in checkbox_values.items():
                     # Find matching PDF fields for this checkbox value
                     for pdf_field in self.checkbox_fields:
-                        pdf_field_normalized = self._normalize_field_name(pdf_field).lower()
+                        pdf_field_normalized = self.normalized_pdf_fields[pdf_field].lower()
                         
                         # Check if value matches this field
                         if value_key in pdf_field_normalized:
@@ -422,36 +452,34 @@ class AIFieldMapper:
         
         return checkbox_mappings
 
-    def generate_mapping(self, 
-                      extracted_fields: List[str], 
-                      extracted_values: Optional[Dict[str, str]] = None,
-                      custom_mappings: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    def generate_mapping_with_scores(self, 
+                                  extracted_fields: List[str], 
+                                  custom_mappings: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[str, float]]:
         """
-        Generate a mapping from extracted fields to PDF fields
+        Generate a mapping from extracted fields to PDF fields along with each match score
         
         Args:
             extracted_fields: List of field names from extracted data
-            extracted_values: Optional dictionary of field values
             custom_mappings: Optional dictionary of custom mappings to override automatic ones
             
         Returns:
-            Dictionary mapping extracted field names to PDF field names
+            Dictionary mapping extracted field names to (PDF field name, match score) tuples
         """
         # Start with any provided custom mappings
-        final_mapping = {}
+        scored_mapping = {}
         if custom_mappings:
-            final_mapping = custom_mappings.copy()
+            scored_mapping = {ext_field: (pdf_field, 1.0) for ext_field, pdf_field in custom_mappings.items()}
             
         # Fields that haven't been mapped yet
-        unmapped_fields = [f for f in extracted_fields if f not in final_mapping]
+        unmapped_fields = [f for f in extracted_fields if f not in scored_mapping]
         
         # Already targeted PDF fields (to avoid duplicates)
-        used_targets = set(final_mapping.values())
+        used_targets = {pdf_field for pdf_field, _ in scored_mapping.values()}
         
         # Step 1: Find exact matches
         exact_matches = self._get_exact_matches(unmapped_fields)
         for ext_field, match in exact_matches.items():
-            final_mapping[ext_field] = match.target_field
+            scored_mapping[ext_field] = (match.target_field, match.score)
             used_targets.add(match.target_field)
             unmapped_fields.remove(ext_field)
         
@@ -459,7 +487,7 @@ class AIFieldMapper:
         if unmapped_fields:
             fuzzy_matches = self._get_fuzzy_matches(unmapped_fields, used_targets)
             for ext_field, match in fuzzy_matches.items():
-                final_mapping[ext_field] = match.target_field
+                scored_mapping[ext_field] = (match.target_field, match.score)
                 used_targets.add(match.target_field)
                 unmapped_fields.remove(ext_field)
         
@@ -467,10 +495,33 @@ class AIFieldMapper:
         if unmapped_fields:
             semantic_matches = self._get_semantic_matches(unmapped_fields, used_targets)
             for ext_field, match in semantic_matches.items():
-                final_mapping[ext_field] = match.target_field
+                scored_mapping[ext_field] = (match.target_field, match.score)
                 used_targets.add(match.target_field)
                 unmapped_fields.remove(ext_field)
         
+        self.field_mapping = {ext_field: pdf_field for ext_field, (pdf_field, _) in scored_mapping.items()}
+        return scored_mapping
+
+    def generate_mapping(self, 
+                      extracted_fields: List[str], 
+                      extracted_values: Optional[Dict[str, str]] = None,
+                      custom_mappings: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Generate a mapping from extracted fields to PDF fields
+        
+        Args:
+            extracted_fields: List of field names from extracted data
+            extracted_values: Optional dictionary of field values
+            custom_mappings: Optional dictionary of custom mappings to override automatic ones
+            
+        Returns:
+            Dictionary mapping extracted field names to PDF field names
+        """
+        # Steps 1-3: exact, fuzzy and semantic matches on top of the custom mappings
+        self.generate_mapping_with_scores(extracted_fields, custom_mappings)
+        final_mapping = self.field_mapping
+        used_targets = set(final_mapping.values())
+        
         # Step 4: Process checkbox fields if we have values
         if extracted_values:
             checkbox_mappings = self.map_checkbox_fields(extracted_values)
@@ -481,7 +532,6 @@ class AIFieldMapper:
                     # For checkboxes, we'll use field:value mapping rather than field:field
                     final_mapping[f"checkbox:{checkbox_field}"] = value
         
-        self.field_mapping = final_mapping
         return final_mapping
     
     def save_mapping(self, output_path: str) -> str:
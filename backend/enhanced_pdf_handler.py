@@ -10,6 +10,7 @@ This module provides advanced capabilities for:
 5. Smart text handling for text that exceeds field size
 """
 
+import io
 import os
 import sys
 import json
@@ -17,11 +18,30 @@ import tempfile
 import logging
 import warnings
 import textwrap
-from pypdf import PdfReader, PdfWriter
-from pypdf.generic import NameObject, TextStringObject, BooleanObject, DictionaryObject, ArrayObject
+from pypdf import PdfReader, PdfWriter, PageObject
+from pypdf.generic import (
+    NameObject, TextStringObject, BooleanObject, DictionaryObject, ArrayObject,
+    DecodedStreamObject, IndirectObject, StreamObject
+)
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
 
+# Optional PDF flattening backends, detected once at import
+try:
+    import pdftron
+    _HAS_PDFTRON = True
+except ImportError:
+    _HAS_PDFTRON = False
+
+try:
+    import pikepdf
+    _HAS_PIKEPDF = True
+except ImportError:
+    _HAS_PIKEPDF = False
+
+_PDF_BACKEND = 'pdftron' if _HAS_PDFTRON else 'pikepdf' if _HAS_PIKEPDF else 'pypdf'
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -48,6 +68,19 @@ FIELD_TYPE_MAP = {
 CHECKBOX_MASK = 1 << 15
 RADIO_BUTTON_MASK = 1 << 16
 
+# Checkbox states used when filling boolean values
+_BOOL_CHECKBOX = {True: "Yes", False: "Off"}
+
+# PDF names reused for every field update
+_NAME_V = NameObject("/V")
+_NAME_AS = NameObject("/AS")
+_NAME_OFF = NameObject("/Off")
+_NAME_ANNOTS = NameObject("/Annots")
+_NAME_ACROFORM = NameObject("/AcroForm")
+_NAME_CONTENTS = NameObject("/Contents")
+_NAME_RESOURCES = NameObject("/Resources")
+_NAME_XOBJECT = NameObject("/XObject")
+
 class PDFFieldInfo:
     """Class to hold detailed information about a PDF field"""
     
@@ -312,6 +345,8 @@ class PDFFiller:
     def __init__(self, pdf_path: str):
         self.analyzer = PDFAnalyzer(pdf_path)
         self.pdf_path = pdf_path
+        # Keep the template bytes so repeated fills don't go back to disk
+        self._template_bytes = Path(pdf_path).read_bytes()
         
     def _prepare_text_value(self, field_info: PDFFieldInfo, value: str) -> str:
         """
@@ -412,18 +447,18 @@ class PDFFiller:
                 try:
                     if hasattr(self.analyzer.reader, 'root') and "/AcroForm" in self.analyzer.reader.root:
                         writer._root_object.update({
-                            NameObject("/AcroForm"): self.analyzer.reader.root["/AcroForm"]
+                            _NAME_ACROFORM: self.analyzer.reader.root["/AcroForm"]
                         })
                     else:
                         # Ensure we have an empty AcroForm dictionary if none exists
                         writer._root_object.update({
-                            NameObject("/AcroForm"): DictionaryObject()
+                            _NAME_ACROFORM: DictionaryObject()
                         })
                 except AttributeError:
                     logger.warning("Reader has no 'root' attribute, trying alternative method")
                     # Try to manually construct a minimal AcroForm
                     writer._root_object.update({
-                        NameObject("/AcroForm"): DictionaryObject()
+                        _NAME_ACROFORM: DictionaryObject()
                     })
                 
                 # Process fields into types
@@ -456,6 +491,8 @@ class PDFFiller:
                         fields_to_fill[pdf_field_name] = value
                 
                 # Now fill all fields by type
+                field_widgets = None
+                page_updates = {}
                 for field_name, value in fields_to_fill.items():
                     field_type = field_types.get(field_name)
                     
@@ -466,15 +503,24 @@ class PDFFiller:
                         # Handle radio button
                         self._fill_radio_button(writer, field_name, str(value))
                     else:
-                        # Handle text and other fields - use the existing update method
-                        update_fields = {field_name: value}
-                        try:
-                            for page_num, page in enumerate(writer.pages):
-                                writer.update_page_form_field_values(
-                                    page, update_fields, auto_regenerate=False
-                                )
-                        except Exception as e:
-                            logger.warning(f"Failed to update field {field_name}: {e}")
+                        # Handle text and other fields - group them by the pages holding their widgets
+                        if field_widgets is None:
+                            field_widgets = self._index_field_widgets(writer)
+                        entry = field_widgets.get(field_name)
+                        if entry is None:
+                            logger.warning(f"No widget found for field {field_name}")
+                            continue
+                        for page_num, _ in entry[1]:
+                            page_updates.setdefault(page_num, {})[field_name] = value
+                
+                # Update each affected page once with all of its text fields
+                for page_num, update_fields in page_updates.items():
+                    try:
+                        writer.update_page_form_field_values(
+                            writer.pages[page_num], update_fields, auto_regenerate=False
+                        )
+                    except Exception as e:
+                        logger.warning(f"Failed to update fields on page {page_num + 1}: {e}")
                 
                 # Write to the output file
                 with open(output_path, "wb") as output_file:
@@ -588,11 +634,11 @@ class PDFFiller:
             
             # Set the value
             if checked:
-                field[NameObject("/V")] = NameObject(on_value)
-                field[NameObject("/AS")] = NameObject(on_value)
+                field[_NAME_V] = NameObject(on_value)
+                field[_NAME_AS] = NameObject(on_value)
             else:
-                field[NameObject("/V")] = NameObject("/Off")
-                field[NameObject("/AS")] = NameObject("/Off")
+                field[_NAME_V] = _NAME_OFF
+                field[_NAME_AS] = _NAME_OFF
             
         except Exception as e:
             logger.error(f"Error filling checkbox {field_name}: {str(e)}")
@@ -616,8 +662,8 @@ class PDFFiller:
             # We need to find the one matching our desired value
             if value == "" or value.lower() == "off":
                 # Clear selection
-                field[NameObject("/V")] = NameObject("/Off")
-                field[NameObject("/AS")] = NameObject("/Off")
+                field[_NAME_V] = _NAME_OFF
+                field[_NAME_AS] = _NAME_OFF
             else:
                 # Look for a matching option
                 found = False
@@ -628,16 +674,16 @@ class PDFFiller:
                             # Option value, normalize for comparison
                             option = key[1:] if key.startswith('/') else key
                             if option.lower() == value.lower():
-                                field[NameObject("/V")] = NameObject(key)
-                                field[NameObject("/AS")] = NameObject(key)
+                                field[_NAME_V] = NameObject(key)
+                                field[_NAME_AS] = NameObject(key)
                                 found = True
                                 break
                             
                 if not found:
                     # Try direct assignment in case it's a simple radio button
                     option_name = f"/{value}" if not value.startswith('/') else value
-                    field[NameObject("/V")] = NameObject(option_name)
-                    field[NameObject("/AS")] = NameObject(option_name)
+                    field[_NAME_V] = NameObject(option_name)
+                    field[_NAME_AS] = NameObject(option_name)
                 
         except Exception as e:
             logger.error(f"Error filling radio button {field_name}: {str(e)}")
@@ -673,6 +719,78 @@ class PDFFiller:
                     
         return None
 
+    def _index_field_widgets(
+        self, writer: PdfWriter
+    ) -> Dict[str, Tuple[DictionaryObject, List[Tuple[int, DictionaryObject]]]]:
+        """
+        Index the widget annotations of all pages by field name in a single pass
+
+        Args:
+            writer: PDF writer object
+
+        Returns:
+            Dict mapping both the partial (/T) and fully qualified field name to
+            a (field object, widgets) tuple, where widgets lists the (page index,
+            widget annotation) pairs of the field in page order. The field object
+            is the widget itself unless the widget is a kid of a parent field.
+        """
+        fields = {}
+
+        for page_num, page in enumerate(writer.pages):
+            for annot in page.get('/Annots', []):
+                widget = annot.get_object()
+                if widget.get('/Subtype') != '/Widget':
+                    continue
+
+                if '/T' in widget:
+                    field_obj = widget
+                elif '/Parent' in widget:
+                    field_obj = widget['/Parent'].get_object()
+                else:
+                    continue
+
+                if '/T' not in field_obj:
+                    continue
+
+                entry = fields.get(id(field_obj))
+                if entry is None:
+                    entry = fields[id(field_obj)] = (field_obj, [])
+                entry[1].append((page_num, widget))
+
+        field_widgets = {}
+        for entry in fields.values():
+            # Build the qualified name (parent.child) the analyzer reports
+            names = []
+            node = entry[0]
+            while node is not None:
+                if '/T' in node:
+                    names.append(str(node['/T']))
+                parent = node.get('/Parent')
+                node = parent.get_object() if parent is not None else None
+
+            field_widgets.setdefault('.'.join(reversed(names)), entry)
+            field_widgets.setdefault(names[0], entry)
+
+        return field_widgets
+
+    def _resolve_field_type(self, field_obj: DictionaryObject) -> Optional[str]:
+        """
+        Get the /FT of a field object, following /Parent since kids may inherit it
+        
+        Args:
+            field_obj: Field dictionary or widget annotation
+            
+        Returns:
+            Field type name (e.g. '/Tx', '/Btn') or None if no level defines one
+        """
+        node = field_obj
+        while node is not None:
+            if '/FT' in node:
+                return node['/FT']
+            parent = node.get('/Parent')
+            node = parent.get_object() if parent is not None else None
+        return None
+
     def _get_field_type(self, field_name: str) -> str:
         """
         Get the type of a form field
@@ -710,84 +828,196 @@ class PDFFiller:
             Path to the filled PDF
         """
         try:
-            # Try with a fresh reader/writer approach
-            with open(self.pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                writer = PdfWriter()
-                
-                # Copy all pages
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # Manually add a proper AcroForm dictionary
-                if '/AcroForm' not in writer._root_object:
-                    logger.info("Adding minimal /AcroForm dictionary to writer")
-                    acroform = DictionaryObject()
-                    acroform[NameObject('/Fields')] = ArrayObject()
-                    writer._root_object[NameObject('/AcroForm')] = acroform
-                
-                # Get field names from the PDF
-                field_names = set()
-                fields = reader.get_fields()
-                if fields:
-                    field_names.update(fields.keys())
-                else:
-                    logger.warning("No form fields found in the PDF")
-                
-                # Copy form fields from the original PDF if possible
-                try:
-                    if hasattr(reader, 'root') and '/AcroForm' in reader.root:
-                        logger.info("Copying AcroForm structure from original PDF")
-                        writer._root_object[NameObject('/AcroForm')] = reader.root['/AcroForm']
-                except Exception as e:
-                    logger.warning(f"Could not copy AcroForm: {e}")
-                
-                # Prepare a safe subset of fields to fill
-                safe_fields = {}
-                for name, value in field_data.items():
-                    if name in field_names:
-                        # Convert boolean values to strings for checkboxes
-                        if isinstance(value, bool):
-                            safe_fields[name] = "Yes" if value else "Off"
-                        else:
-                            safe_fields[name] = value
-                
-                # Update fields - simpler approach with better error handling
-                if safe_fields:
-                    try:
-                        writer.update_page_form_field_values(writer.pages[0], safe_fields)
-                        logger.info(f"Updated {len(safe_fields)} fields using alternative method")
-                    except Exception as field_e:
-                        logger.error(f"Could not update fields: {field_e}")
-                        # Add specific handling for known error types
-                        if "No /AcroForm dictionary" in str(field_e):
-                            logger.warning("PDF structure issue: No /AcroForm dictionary available")
-                            # Since we've already tried to add one, this is a deeper structural issue
-                            logger.warning("Skipping field updates and just returning a copy of the PDF")
-                
-                # Write to output file
-                try:
-                    with open(output_path, 'wb') as output_file:
-                        writer.write(output_file)
-                    logger.info(f"Wrote PDF to {output_path} using alternative method")
-                except Exception as write_e:
-                    logger.error(f"Failed to write PDF: {write_e}")
-                    raise
-                
-                # If flattening is requested, do a separate pass for that
+            # Try with a fresh reader/writer approach on the cached template bytes
+            reader = PdfReader(io.BytesIO(self._template_bytes))
+            
+            # Clone the whole document - copying pages one by one drops the /Parent
+            # links between widgets and their fields
+            writer = PdfWriter(clone_from=reader)
+            
+            # Manually add a proper AcroForm dictionary
+            if '/AcroForm' not in writer._root_object:
+                logger.info("Adding minimal /AcroForm dictionary to writer")
+                acroform = DictionaryObject()
+                acroform[NameObject('/Fields')] = ArrayObject()
+                writer._root_object[_NAME_ACROFORM] = acroform
+            
+            # Get field names from the PDF
+            field_names = set()
+            fields = reader.get_fields()
+            if fields:
+                field_names.update(fields.keys())
+            else:
+                logger.warning("No form fields found in the PDF")
+            
+            # Copy form fields from the original PDF if possible
+            try:
+                if hasattr(reader, 'root') and '/AcroForm' in reader.root:
+                    logger.info("Copying AcroForm structure from original PDF")
+                    writer._root_object[_NAME_ACROFORM] = reader.root['/AcroForm']
+            except Exception as e:
+                logger.warning(f"Could not copy AcroForm: {e}")
+            
+            # Prepare a safe subset of fields to fill
+            safe_fields = {}
+            for name, value in field_data.items():
+                if name in field_names:
+                    # Convert boolean values to strings for checkboxes
+                    safe_fields[name] = _BOOL_CHECKBOX[value] if type(value) is bool else value
+            
+            # Nothing to fill - skip serializing the writer and copy the template as is
+            if not safe_fields:
+                logger.warning("No matching fields to fill, copying the original PDF")
+                Path(output_path).write_bytes(self._template_bytes)
                 if flatten:
                     self._flatten_pdf(output_path)
-                
                 return output_path
+            
+            # Update fields - index the widget annotations once, set button states directly
+            # and let pypdf fill the other fields page by page so it generates their appearances
+            try:
+                field_widgets = self._index_field_widgets(writer)
+                page_updates = {}
+                updated = 0
+                for name, value in safe_fields.items():
+                    entry = field_widgets.get(name)
+                    if entry is None:
+                        continue
+                    field_obj, widgets = entry
+                    if self._resolve_field_type(field_obj) == '/Btn':
+                        state = str(value)
+                        state = NameObject(state if state.startswith('/') else f"/{state}")
+                        field_obj[_NAME_V] = state
+                        # Show the state on the widget that has an appearance for it, turn the others off
+                        for _, widget in widgets:
+                            appearances = widget.get('/AP')
+                            normal = appearances.get_object().get('/N') if appearances is not None else None
+                            normal = normal.get_object() if normal is not None else None
+                            if isinstance(normal, DictionaryObject) and not isinstance(normal, StreamObject):
+                                widget[_NAME_AS] = state if state in normal else _NAME_OFF
+                            else:
+                                widget[_NAME_AS] = state
+                    else:
+                        for page_num, _ in widgets:
+                            page_updates.setdefault(page_num, {})[name] = value
+                    updated += 1
+                for page_num, update_fields in page_updates.items():
+                    writer.update_page_form_field_values(
+                        writer.pages[page_num], update_fields, auto_regenerate=False
+                    )
+                logger.info(f"Updated {updated} fields using alternative method")
+            except Exception as field_e:
+                logger.error(f"Could not update fields: {field_e}")
+                # Add specific handling for known error types
+                if "No /AcroForm dictionary" in str(field_e):
+                    logger.warning("PDF structure issue: No /AcroForm dictionary available")
+                    # Since we've already tried to add one, this is a deeper structural issue
+                    logger.warning("Skipping field updates and just returning a copy of the PDF")
+            
+            # Write to output file - serialize in memory, then write once
+            try:
+                buffer = io.BytesIO()
+                writer.write(buffer)
+                Path(output_path).write_bytes(buffer.getvalue())
+                logger.info(f"Wrote PDF to {output_path} using alternative method")
+            except Exception as write_e:
+                logger.error(f"Failed to write PDF: {write_e}")
+                raise
+            
+            # If flattening is requested, do a separate pass for that
+            if flatten:
+                self._flatten_pdf(output_path)
+            
+            return output_path
         
         except Exception as e:
             logger.error(f"Alternative form filling method also failed: {str(e)}")
             # As a last resort, just copy the original PDF
             logger.warning("Falling back to copying the original PDF without filling")
-            with open(self.pdf_path, 'rb') as src, open(output_path, 'wb') as dst:
-                dst.write(src.read())
+            Path(output_path).write_bytes(self._template_bytes)
             return output_path
 
+    def _stamp_widget_appearances(self, writer: PdfWriter, page: PageObject) -> None:
+        """
+        Draw the normal appearance of each widget into the page content and remove the widgets
+        
+        Args:
+            writer: PDF writer object holding the page
+            page: Page to flatten
+        """
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else DictionaryObject()
+        page[_NAME_RESOURCES] = resources
+        xobjects = resources.get('/XObject')
+        xobjects = xobjects.get_object() if xobjects is not None else DictionaryObject()
+        resources[_NAME_XOBJECT] = xobjects
+        
+        operations = []
+        kept_annots = ArrayObject()
+        for index, annot in enumerate(page['/Annots'].get_object()):
+            widget = annot.get_object()
+            if widget.get('/Subtype') != '/Widget':
+                kept_annots.append(annot)
+                continue
+            
+            # Hidden widgets are not drawn
+            if int(widget.get('/F', 0)) & 2 or '/AP' not in widget:
+                continue
+            appearances = widget['/AP'].get_object()
+            if '/N' not in appearances:
+                continue
+            
+            # Checkboxes and radio buttons keep one appearance per state, selected by /AS
+            appearance_ref = appearances.raw_get('/N')
+            appearance = appearance_ref.get_object()
+            if not isinstance(appearance, StreamObject):
+                state = widget.get('/AS')
+                if state is None or state not in appearance:
+                    continue
+                appearance_ref = appearance.raw_get(state)
+                appearance = appearance_ref.get_object()
+                if not isinstance(appearance, StreamObject):
+                    continue
+            if not isinstance(appearance_ref, IndirectObject):
+                appearance_ref = writer._add_object(appearance)
+            
+            # Map the transformed appearance bounding box onto the widget rectangle
+            rect_x1, rect_y1, rect_x2, rect_y2 = (float(value) for value in widget['/Rect'])
+            rect_x1, rect_x2 = sorted((rect_x1, rect_x2))
+            rect_y1, rect_y2 = sorted((rect_y1, rect_y2))
+            bbox = [float(value) for value in appearance.get('/BBox', (0, 0, rect_x2 - rect_x1, rect_y2 - rect_y1))]
+            a, b, c, d, e, f = (float(value) for value in appearance.get('/Matrix', (1, 0, 0, 1, 0, 0)))
+            corners = [(a * x + c * y + e, b * x + d * y + f) for x in (bbox[0], bbox[2]) for y in (bbox[1], bbox[3])]
+            box_x1, box_x2 = min(x for x, _ in corners), max(x for x, _ in corners)
+            box_y1, box_y2 = min(y for _, y in corners), max(y for _, y in corners)
+            scale_x = (rect_x2 - rect_x1) / (box_x2 - box_x1) if box_x2 > box_x1 else 1
+            scale_y = (rect_y2 - rect_y1) / (box_y2 - box_y1) if box_y2 > box_y1 else 1
+            
+            name = f"/FlattenedField{index}"
+            xobjects[NameObject(name)] = appearance_ref
+            operations.append(
+                f"q {scale_x:.6f} 0 0 {scale_y:.6f} {rect_x1 - box_x1 * scale_x:.6f} "
+                f"{rect_y1 - box_y1 * scale_y:.6f} cm {name} Do Q"
+            )
+        
+        if operations:
+            # Isolate the existing content's graphics state from the stamped appearances
+            prefix = DecodedStreamObject()
+            prefix.set_data(b"q\n")
+            suffix = DecodedStreamObject()
+            suffix.set_data(("Q\n" + "\n".join(operations) + "\n").encode('ascii'))
+            contents = page.raw_get('/Contents') if '/Contents' in page else ArrayObject()
+            if isinstance(contents.get_object(), ArrayObject):
+                contents = list(contents.get_object())
+            else:
+                contents = [contents]
+            page[_NAME_CONTENTS] = ArrayObject([writer._add_object(prefix), *contents, writer._add_object(suffix)])
+        
+        if kept_annots:
+            page[_NAME_ANNOTS] = kept_annots
+        else:
+            del page['/Annots']
+
     def _flatten_pdf(self, pdf_path: str) -> None:
         """
         Flatten a PDF (make form fields non-interactive)
@@ -800,23 +1030,13 @@ class PDFFiller:
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
                 temp_path = temp_file.name
             
-            # Use pdftron if available (best option for flattening)
-            try:
-                import pdftron
+            if _PDF_BACKEND == 'pdftron':
+                # pdftron gives the best flattening results
                 pdftron.PDFNet.Initialize()
                 doc = pdftron.PDFDoc(pdf_path)
                 doc.FlattenAnnotations()
                 doc.Save(temp_path, pdftron.SDFDoc.e_linearized)
-                
-                # Replace original with flattened version
-                os.replace(temp_path, pdf_path)
-                return
-            except ImportError:
-                logger.debug("pdftron not available, trying alternative method")
-            
-            # Try with pikepdf as alternative
-            try:
-                import pikepdf
+            elif _PDF_BACKEND == 'pikepdf':
                 pdf = pikepdf.Pdf.open(pdf_path)
                 
                 # Iterate through pages
@@ -827,36 +1047,30 @@ class PDFFiller:
                 
                 # Save flattened file
                 pdf.save(temp_path)
-                os.replace(temp_path, pdf_path)
-                return
-            except ImportError:
-                logger.debug("pikepdf not available, trying PyPDF method")
-            
-            # Fall back to PyPDF method (least effective but most compatible)
-            with open(pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                writer = PdfWriter()
-                
-                # Copy pages and attempt to flatten
-                for page in reader.pages:
-                    writer.add_page(page)
+            else:
+                # Fall back to PyPDF method (least effective but most compatible)
+                with open(pdf_path, 'rb') as file:
+                    reader = PdfReader(file)
+                    writer = PdfWriter()
                     
-                    # Remove /AcroForm to make fields non-interactive
+                    # Copy pages and flatten them
+                    for page in reader.pages:
+                        writer_page = writer.add_page(page)
+
+                        # Draw the filled values into the page, then drop the widget annotations
+                        if '/Annots' in writer_page:
+                            self._stamp_widget_appearances(writer, writer_page)
+
+                    # Remove /AcroForm once to make fields non-interactive
                     if '/AcroForm' in writer._root_object:
                         del writer._root_object['/AcroForm']
-                    
-                    # Copy field values as text
-                    if hasattr(page, '/Annots') and page['/Annots']:
-                        # This is a simplified approach and may not work perfectly
-                        annotations = page['/Annots']
-                        page[NameObject('/Annots')] = []
-                
-                # Save the flattened PDF
-                with open(temp_path, 'wb') as output:
-                    writer.write(output)
-                
-                # Replace original with flattened version
-                os.replace(temp_path, pdf_path)
+
+                    # Save the flattened PDF
+                    with open(temp_path, 'wb') as output:
+                        writer.write(output)
+            
+            # Replace original with flattened version
+            os.replace(temp_path, pdf_path)
         
         except Exception as e:
             logger.error(f"Error flattening PDF: {str(e)}")
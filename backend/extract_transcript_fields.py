@@ -8,9 +8,33 @@ and their values using pattern recognition and NLP techniques.
 
 import re
 import sys
+import string
 import json
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple, Optional, FrozenSet, Set
+
+# The pattern parser used to find prefilter triggers is private to re; without it
+# no triggers are derived and every pattern is always run
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    sre_parse = None
+
+# Optional Aho-Corasick automaton for the literal prefilter
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    _HAS_AHOCORASICK = False
+
+# Optional fast JSON serializer for saved results
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -226,9 +250,9 @@ COMMON_FIELDS = {
         r"(?:property|home|house|residence)(?:\s+is)?\s+(?:a|an)\s+(single family|townhouse|condo|condominium|duplex|apartment|multi-family|mobile home)",
     ],
     'number_of_units': [
+        r"(?:number of units|units)(?:\s+is)?:?\s+(\d+)",
         r"(?:property|building|home)\s+has\s+(\d+)\s+units",
-        r"(\d+)(?:[- ]unit|\s+units)",
-        r"(?:number of units|units):?\s+(\d+)",
+        r"(\d+)(?:-|\s+)unit(?:\s+property|\s+building)?",
     ],
     'property_use': [
         r"(?:property|home|house|residence)\s+(?:will be|is|as)(?:\s+a|my)?\s+(primary residence|second home|investment|vacation home)",
@@ -236,9 +260,10 @@ COMMON_FIELDS = {
         r"(?:primary residence|second home|investment property|vacation home)",
     ],
     'year_built': [
-        r"(?:property|home|house)\s+(?:was)?\s+built\s+in\s+(\d{4})",
+        r"(?:property|home|house)\s+(?:was)?\s+built(?:\s+in)?\s+(\d{4})",
+        r"(?:year built|built in|construction year|construction date)(?:\s+is)?:?\s+(\d{4})",
+        r"built(?:\s+in)?\s+(\d{4})",
         r"(?:built|construction|year built)(?:\s+in|\s+date)?:?\s+(\d{4})",
-        r"year (?:built|of construction):?\s+(\d{4})",
     ],
     
     # Asset information
@@ -366,18 +391,6 @@ COMMON_FIELDS = {
         r"(\d+)\s+years",  # Convert to months in processing
     ],
     
-    # Property details
-    'number_of_units': [
-        r"(?:number of units|units)(?:\s+is)?:?\s+(\d+)",
-        r"(?:property|building|home)\s+has\s+(\d+)\s+units",
-        r"(\d+)(?:-|\s+)unit(?:\s+property|\s+building)?",
-    ],
-    'year_built': [
-        r"(?:property|home|house)\s+(?:was)?\s+built(?:\s+in)?\s+(\d{4})",
-        r"(?:year built|built in|construction year|construction date)(?:\s+is)?:?\s+(\d{4})",
-        r"built(?:\s+in)?\s+(\d{4})",
-    ],
-    
     # Estate type checkboxes
     'estate_type': [
         r"(?:estate(?:\s+will be|\s+is)?\s+held|title(?:\s+will be|\s+is)?\s+held)(?:\s+in)?:?\s+(fee simple|leasehold)",
@@ -392,17 +405,207 @@ COMMON_FIELDS = {
     ],
 }
 
+# Uppercase letters outside escape sequences (\S, \W, ... keep their meaning)
+_PATTERN_UPPER_RE = re.compile(r'(\\.)|([A-Z])')
+
+# ASCII-only lowercasing keeps every character at the same offset
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def _lowercase_pattern(pattern: str) -> str:
+    """Lowercase the literal letters of a pattern so it can run without IGNORECASE"""
+    return _PATTERN_UPPER_RE.sub(lambda match: match.group(1) or match.group(2).lower(), pattern)
+
+def _lowercase(text: str) -> str:
+    """Lowercase text for matching, keeping offsets aligned with the original"""
+    return text.lower() if text.isascii() else text.translate(_ASCII_LOWER)
+
+# Field patterns run on lowercased text, which is much faster for the re engine
+# than IGNORECASE; values are sliced from the original text by span so their
+# case is preserved.
+_LOWERED_FIELDS = {
+    field_type: [_lowercase_pattern(pattern) for pattern in patterns]
+    for field_type, patterns in COMMON_FIELDS.items()
+}
+
+@lru_cache(maxsize=None)
+def _compiled_field(field_type: str) -> List[re.Pattern]:
+    """Compile a field type's patterns the first time the field is scanned"""
+    return [re.compile(pattern) for pattern in _LOWERED_FIELDS[field_type]]
+
+# Shortest literal worth using as a prefilter trigger
+_MIN_TRIGGER_LENGTH = 3
+
+def _required_literals(items) -> Optional[FrozenSet[str]]:
+    """
+    Find literals of which every match of a parsed pattern must contain at least one
+    
+    Args:
+        items: Parsed pattern (sequence of opcode, argument pairs)
+        
+    Returns:
+        Frozenset of lowercased literal strings, or None if no useful literal is required
+    """
+    candidates = []
+    run = []
+    
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        
+        # Any other item ends the current run of literal characters
+        if run:
+            candidates.append(frozenset([''.join(run).lower()]))
+            run = []
+        
+        if op is sre_parse.SUBPATTERN:
+            literals = _required_literals(av[-1])
+        elif op is sre_parse.BRANCH:
+            # Every branch has to contribute, otherwise a match may avoid them all
+            branches = [_required_literals(branch) for branch in av[1]]
+            literals = None if None in branches else frozenset().union(*branches)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            literals = _required_literals(av[2])
+        else:
+            literals = None
+        
+        if literals:
+            candidates.append(literals)
+    
+    if run:
+        candidates.append(frozenset([''.join(run).lower()]))
+    
+    # Prefer the candidate whose shortest literal is longest - it filters best
+    best = max(candidates, key=lambda literals: min(map(len, literals)), default=None)
+    if best is None or min(map(len, best)) < _MIN_TRIGGER_LENGTH:
+        return None
+    return best
+
+def _pattern_triggers(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Get the prefilter triggers of a single pattern
+    
+    Args:
+        pattern: Lowercased field pattern
+        
+    Returns:
+        Frozenset of lowercased triggers, or None if the pattern must always be run
+    """
+    if sre_parse is None:
+        return None
+    try:
+        return _required_literals(sre_parse.parse(pattern))
+    except Exception:
+        # The private parse tree changed shape - don't filter this pattern
+        return None
+
+# Triggers of each pattern, in the same order as COMMON_FIELDS
+_PATTERN_TRIGGERS = {
+    field_type: [_pattern_triggers(pattern) for pattern in patterns]
+    for field_type, patterns in _LOWERED_FIELDS.items()
+}
+
+def _field_triggers(pattern_triggers: List[Optional[FrozenSet[str]]]) -> Optional[FrozenSet[str]]:
+    """
+    Collect the prefilter triggers of a field type
+    
+    Args:
+        pattern_triggers: Triggers of each of the field's patterns
+        
+    Returns:
+        Frozenset of lowercased triggers, or None if the field must always be scanned
+    """
+    if None in pattern_triggers:
+        return None
+    return frozenset().union(*pattern_triggers)
+
+_FIELD_TRIGGERS = {
+    field_type: _field_triggers(pattern_triggers)
+    for field_type, pattern_triggers in _PATTERN_TRIGGERS.items()
+}
+
+# Fields without a required literal are scanned for every transcript
+_UNFILTERED_FIELDS = frozenset(
+    field_type for field_type, triggers in _FIELD_TRIGGERS.items() if triggers is None
+)
+
+def _build_trigger_automaton():
+    """Build an Aho-Corasick automaton mapping each trigger to its field types"""
+    trigger_fields = {}
+    for field_type, triggers in _FIELD_TRIGGERS.items():
+        for trigger in triggers or ():
+            trigger_fields.setdefault(trigger, set()).add(field_type)
+    
+    automaton = ahocorasick.Automaton()
+    for trigger, fields in trigger_fields.items():
+        automaton.add_word(trigger, frozenset(fields))
+    automaton.make_automaton()
+    return automaton
+
+_TRIGGERS = _build_trigger_automaton() if _HAS_AHOCORASICK else None
+
+def _candidate_fields(lowered: str) -> Set[str]:
+    """
+    Find the field types whose patterns can possibly match the text
+    
+    Args:
+        lowered: Cleaned transcript text in lowercase
+        
+    Returns:
+        Set of field types worth scanning with their regexes
+    """
+    candidates = set(_UNFILTERED_FIELDS)
+    
+    if _HAS_AHOCORASICK:
+        for _, fields in _TRIGGERS.iter(lowered):
+            candidates.update(fields)
+    else:
+        for field_type, triggers in _FIELD_TRIGGERS.items():
+            if triggers is not None and any(trigger in lowered for trigger in triggers):
+                candidates.add(field_type)
+    
+    return candidates
+
+# Runs of whitespace collapsed by clean_text
+_WS_RE = re.compile(r'\s+')
+
+# Common spoken forms clean_text rewrites to a standard format, in one pass
+_SPOKEN_FORMS_RE = re.compile(r'(?i)my (?:(name|email) is|phone (?:number )?is)')
+_STANDARD_FORMS = {'name': 'My name is', 'email': 'My email is', None: 'My phone is'}
+
+def _standard_form(match: re.Match) -> str:
+    """Replacement for _SPOKEN_FORMS_RE"""
+    keyword = match.group(1)
+    return _STANDARD_FORMS[keyword.lower() if keyword else None]
+
+# Common patterns for field name introductions (matched against lowercased text)
+_POTENTIAL_FIELD_PATTERNS = [
+    re.compile(r"(?:what(?:'s| is) your|could (?:i|you) get your|(?:i need|we need) your|please provide your|enter your|fill in your|give me your)\s+([a-z][a-z\s]+?)\??(?:\s|$|\.|\?)"),
+    re.compile(r"(?:your|the|applicant(?:'s)?)\s+([a-z][a-z\s]+?)\s+(?:is|will be|should be|was|has been|:)"),
+    re.compile(r"(?:do you have|have you|are you|were you)\s+([a-z][a-z\s]+?)\??(?:\s|$|\.|\?)"),
+]
+
+# Common phrases that are never reported as potential field names
+_STOPWORDS = frozenset(['information', 'response', 'answer', 'reply', 'question', 'name', 'email', 'phone'])
+
 def clean_text(text: str) -> str:
     """Clean and normalize text for better pattern matching"""
     # Remove extra whitespaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     # Convert common spoken forms to standard format
-    text = re.sub(r'(?i)my name is', 'My name is', text)
-    text = re.sub(r'(?i)my email is', 'My email is', text)
-    text = re.sub(r'(?i)my phone (?:number )?is', 'My phone is', text)
+    text = _SPOKEN_FORMS_RE.sub(_standard_form, text)
     return text.strip()
 
-def extract_field_value_pairs(transcript: str) -> Dict[str, List[Dict[str, Any]]]:
+@dataclass(slots=True)
+class TranscriptMatch:
+    """Class representing a field value found in a transcript"""
+    field_name: str                # Field type (key of COMMON_FIELDS)
+    field_value: str               # Extracted value, in its original case
+    span: Tuple[int, int]          # Offsets of the match in the cleaned transcript
+    confidence_score: float        # Match confidence (0-1)
+    pattern_idx: int               # Index of the pattern that matched
+
+def extract_field_value_pairs(transcript: str) -> Dict[str, List[TranscriptMatch]]:
     """
     Extract field name and value pairs from a transcript
     
@@ -410,7 +613,7 @@ def extract_field_value_pairs(transcript: str) -> Dict[str, List[Dict[str, Any]]
         transcript: The text of the call transcript
         
     Returns:
-        Dictionary with field types as keys and lists of extracted values as values
+        Dictionary with field types as keys and lists of TranscriptMatch as values
     """
     # Clean the text
     clean_transcript = clean_text(transcript)
@@ -418,30 +621,38 @@ def extract_field_value_pairs(transcript: str) -> Dict[str, List[Dict[str, Any]]
     # Storage for extracted fields
     extracted_fields = {}
     
-    # Process each field type
-    for field_type, patterns in COMMON_FIELDS.items():
+    # Process each field type, skipping those whose required literals never appear in the text
+    lowered = _lowercase(clean_transcript)
+    candidates = _candidate_fields(lowered)
+    
+    for field_type in COMMON_FIELDS:
+        if field_type not in candidates:
+            continue
+        
+        patterns = _compiled_field(field_type)
         field_matches = []
         
-        for pattern in patterns:
-            matches = re.finditer(pattern, clean_transcript, re.IGNORECASE)
+        for pattern_idx, (pattern, triggers) in enumerate(zip(patterns, _PATTERN_TRIGGERS[field_type])):
+            # Only run patterns whose required literals appear in the text
+            if triggers is not None and not any(trigger in lowered for trigger in triggers):
+                continue
             
-            for match in matches:
-                # Extract the value and surrounding context
-                value = match.group(1).strip()
-                
-                # Get some context (10 words before and after)
-                start_pos = max(0, match.start() - 50)
-                end_pos = min(len(clean_transcript), match.end() + 50)
-                context = clean_transcript[start_pos:end_pos]
+            # Patterns without a capture group use the whole match as the value
+            has_group = pattern.groups > 0
+            
+            for match in pattern.finditer(lowered):
+                # Take the value from the original-case text
+                start, end = match.span(1 if has_group else 0)
+                value = clean_transcript[start:end].strip()
                 
                 # Add to our matches
-                field_matches.append({
-                    'field_name': field_type,
-                    'field_value': value,
-                    'context': context,
-                    'confidence_score': 0.7,  # Basic confidence score
-                    'pattern_used': pattern
-                })
+                field_matches.append(TranscriptMatch(
+                    field_type,
+                    value,
+                    match.span(),
+                    0.7,  # Basic confidence score
+                    pattern_idx
+                ))
         
         if field_matches:
             extracted_fields[field_type] = field_matches
@@ -458,18 +669,44 @@ def extract_to_flat_list(transcript: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries with field_name, field_value, and confidence_score
     """
-    extracted_dict = extract_field_value_pairs(transcript)
+    return _extract_best_only(clean_text(transcript))
+
+def _extract_best_only(clean_transcript: str) -> List[Dict[str, Any]]:
+    """
+    Find only the best match of each field type, without collecting every match
+    
+    All matches share the same confidence score, so the best match is the first
+    match of the earliest pattern that matches at all.
+    
+    Args:
+        clean_transcript: The cleaned transcript text
+        
+    Returns:
+        List of dictionaries with field_name, field_value, and confidence_score
+    """
+    lowered = _lowercase(clean_transcript)
+    candidates = _candidate_fields(lowered)
     flat_list = []
     
-    for field_type, matches in extracted_dict.items():
-        # Take the first match with highest confidence for each field type
-        if matches:
-            best_match = max(matches, key=lambda x: x['confidence_score'])
-            flat_list.append({
-                'field_name': field_type,
-                'field_value': best_match['field_value'],
-                'confidence_score': best_match['confidence_score']
-            })
+    for field_type in COMMON_FIELDS:
+        if field_type not in candidates:
+            continue
+        
+        patterns = _compiled_field(field_type)
+        for pattern, triggers in zip(patterns, _PATTERN_TRIGGERS[field_type]):
+            # Only run patterns whose required literals appear in the text
+            if triggers is not None and not any(trigger in lowered for trigger in triggers):
+                continue
+            match = pattern.search(lowered)
+            if match:
+                start, end = match.span(1 if pattern.groups else 0)
+                value = clean_transcript[start:end]
+                flat_list.append({
+                    'field_name': field_type,
+                    'field_value': value.strip(),
+                    'confidence_score': 0.7
+                })
+                break
     
     return flat_list
 
@@ -483,54 +720,68 @@ def find_potential_field_names(transcript: str) -> List[str]:
     Returns:
         List of potential field names
     """
-    clean_transcript = clean_text(transcript)
-    potential_fields = set()
-    
-    # Common patterns for field name introductions
-    patterns = [
-        r"(?:what(?:'s| is) your|could (?:I|you) get your|(?:I need|we need) your|please provide your|enter your|fill in your|give me your)\s+([a-z][a-z\s]+?)\??(?:\s|$|\.|\?)",
-        r"(?:your|the|applicant(?:'s)?)\s+([a-z][a-z\s]+?)\s+(?:is|will be|should be|was|has been|:)",
-        r"(?:do you have|have you|are you|were you)\s+([a-z][a-z\s]+?)\??(?:\s|$|\.|\?)",
-    ]
-    
-    for pattern in patterns:
-        matches = re.finditer(pattern, clean_transcript, re.IGNORECASE)
-        for match in matches:
-            field_name = match.group(1).strip().lower()
-            
-            # Filter out common non-field phrases
-            stopwords = ['information', 'response', 'answer', 'reply', 'question', 'name', 'email', 'phone']
-            if field_name not in stopwords and len(field_name) > 3:
-                potential_fields.add(field_name)
+    return _potential_field_names(clean_text(transcript))
+
+def _potential_field_names(clean_transcript: str) -> List[str]:
+    """
+    Extract potential field names from an already cleaned transcript
+    
+    Args:
+        clean_transcript: The cleaned transcript text (see clean_text)
+        
+    Returns:
+        List of potential field names
+    """
+    lowered = clean_transcript.lower()
+    
+    candidates = (
+        match.group(1).strip()
+        for pattern in _POTENTIAL_FIELD_PATTERNS
+        for match in pattern.finditer(lowered)
+    )
+    # Filter out common non-field phrases
+    potential_fields = {
+        field_name for field_name in candidates
+        if len(field_name) > 3 and field_name not in _STOPWORDS
+    }
     
     return list(potential_fields)
 
-def analyze_transcript(transcript_path: str, output_path: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+def analyze_transcript(transcript_path: str, output_path: Optional[str] = None,
+                       indent: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
     Analyze a transcript file and extract field values and potential field names
     
     Args:
         transcript_path: Path to the transcript file
         output_path: Optional path to save the results
+        indent: Indentation for the saved JSON; compact output if None
         
     Returns:
         Tuple of (extracted_fields, potential_field_names)
     """
     # Read the transcript
-    with open(transcript_path, 'r') as f:
+    with open(transcript_path, 'r', encoding='utf-8') as f:
         transcript = f.read()
     
-    # Extract fields and potential field names
-    extracted_fields = extract_to_flat_list(transcript)
-    potential_names = find_potential_field_names(transcript)
+    # Extract fields and potential field names from one cleaned copy of the text
+    clean_transcript = clean_text(transcript)
+    extracted_fields = _extract_best_only(clean_transcript)
+    potential_names = _potential_field_names(clean_transcript)
     
     # Save results if output path provided
     if output_path:
-        with open(output_path, 'w') as f:
-            json.dump({
-                'extracted_fields': extracted_fields,
-                'potential_field_names': potential_names
-            }, f, indent=2)
+        results = {
+            'extracted_fields': extracted_fields,
+            'potential_field_names': potential_names
+        }
+        if _HAS_ORJSON and indent is None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(results))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=indent, ensure_ascii=False,
+                          separators=None if indent is not None else (',', ':'))
     
     return extracted_fields, potential_names
 
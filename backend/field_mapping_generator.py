@@ -10,10 +10,28 @@ import sys
 import json
 import argparse
 import logging
-from typing import Dict, List, Any, Set, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, FrozenSet
+from functools import lru_cache
+from itertools import islice
+from itertools import accumulate
+from bisect import bisect_right
 import difflib
 import re
 
+# Optional Aho-Corasick automaton for categorizing field names in one scan
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    _HAS_AHOCORASICK = False
+
+# Optional fast JSON parser/serializer for the CLI input and output files
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 # Add the backend directory to the Python path if needed
 script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
@@ -100,6 +118,11 @@ FIELD_CATEGORIES = {
     ]
 }
 
+# Freeze the term lists and intern every term and synonym once, so the hashing and
+# equality checks of the set operations below are cheap
+FIELD_PATTERNS = {pattern: frozenset(map(sys.intern, terms)) for pattern, terms in FIELD_PATTERNS.items()}
+FIELD_CATEGORIES = {category: tuple(map(sys.intern, synonyms)) for category, synonyms in FIELD_CATEGORIES.items()}
+
 # Map transcript field categories to PDF field patterns
 # These are common patterns in PDF field names for each category
 CATEGORY_TO_PDF_PATTERNS = {
@@ -153,45 +176,110 @@ CATEGORY_TO_PDF_PATTERNS = {
     ]
 }
 
+# Delimiter wrapper shared by the FIELD_PATTERNS entries: (^|[_\s])word($|[_\s])
+_DELIMITED_PATTERN_RE = re.compile(r'^\(\^\|\[_\\s\]\)(.*)\(\$\|\[_\\s\]\)$')
+
+def _fuse_field_patterns() -> Tuple[re.Pattern, Dict[str, frozenset], List[Tuple[re.Pattern, frozenset]]]:
+    """
+    Fuse the delimited FIELD_PATTERNS into one alternation scanned once per field name
+    
+    Only the leading delimiter is consumed and the word plus its trailing delimiter
+    sit in a lookahead, so neighbouring and overlapping words (e.g. "co borrower"
+    and "borrower") are all found. The entries start with distinct words, so at
+    most one alternative can match at a given position.
+    
+    Returns:
+        Tuple of (fused pattern, mapping of group name to terms,
+        list of (pattern, terms) for entries that don't use the delimiter wrapper)
+    """
+    alternatives = []
+    group_terms = {}
+    unfused = []
+    
+    for pattern, terms in FIELD_PATTERNS.items():
+        delimited = _DELIMITED_PATTERN_RE.match(pattern)
+        if delimited is None:
+            unfused.append((re.compile(pattern), terms))
+            continue
+        group = f"g{len(alternatives)}"
+        alternatives.append(f"(?P<{group}>{delimited.group(1)})(?:$|[_\s])")
+        group_terms[group] = terms
+    
+    fused = re.compile(f"(?:^|[_\s])(?=(?:{'|'.join(alternatives)}))")
+    return fused, group_terms, unfused
+
+_FIELD_PATTERNS_RE, _GROUP_TO_TERMS, _UNFUSED_FIELD_PATTERNS = _fuse_field_patterns()
+
+# Per category: an alternation matching any synonym inside a field name, and the
+# synonyms joined by NUL so a field name inside any synonym is one substring test
+_TRANSCRIPT_CATEGORY_MATCHERS = [
+    (category, re.compile('|'.join(map(re.escape, synonyms))), '\0'.join(synonyms))
+    for category, synonyms in FIELD_CATEGORIES.items()
+]
+
+# Per category: one compiled alternation of its regex patterns, in category priority order
+_PDF_CATEGORY_MATCHERS = [
+    (category, re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)))
+    for category, patterns in CATEGORY_TO_PDF_PATTERNS.items()
+]
+
+def _build_category_automaton(category_words: List[List[str]]):
+    """
+    Build an Aho-Corasick automaton mapping each word to the first category using it
+    
+    Args:
+        category_words: Words of each category, in priority order
+        
+    Returns:
+        Automaton whose values are category indexes
+    """
+    automaton = ahocorasick.Automaton()
+    for index, words in enumerate(category_words):
+        for word in words:
+            # Earlier categories take priority for words they share
+            if word not in automaton:
+                automaton.add_word(word, index)
+    automaton.make_automaton()
+    return automaton
+
+_TRANSCRIPT_CATEGORIES = list(FIELD_CATEGORIES)
+
+# All synonyms joined in category order, with the offset where each category starts,
+# so "field name inside a synonym" is a single find across all categories
+_ALL_SYNONYMS = '\0'.join('\0'.join(synonyms) for synonyms in FIELD_CATEGORIES.values())
+_SYNONYM_OFFSETS = list(accumulate(
+    [0] + [len('\0'.join(synonyms)) + 1 for synonyms in FIELD_CATEGORIES.values()][:-1]
+))
+
+if _HAS_AHOCORASICK:
+    _TRANSCRIPT_AUTOMATON = _build_category_automaton(list(FIELD_CATEGORIES.values()))
+
+# Runs of characters normalize_field_name turns into a single space
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+@lru_cache(maxsize=None)
 def normalize_field_name(field_name: str) -> str:
     """
     Normalize a field name for better matching:
     - Convert to lowercase
     - Replace special characters with spaces
-    - Remove common prefixes/suffixes
     - Trim whitespace
     
+    Words such as "form", "field" or "text" are kept: they are only separated
+    from the rest of the name, never stripped.
+    
     Args:
         field_name: The field name to normalize
         
     Returns:
         Normalized field name
     """
-    # Convert to lowercase
-    name = field_name.lower()
-    
-    # Replace special characters with spaces
-    name = re.sub(r'[^a-z0-9]', ' ', name)
-    
-    # Remove common prefixes
-    prefixes = ['form_', 'field_', 'txt_', 'chk_', 'opt_', 'input_']
-    for prefix in prefixes:
-        if name.startswith(prefix):
-            name = name[len(prefix):]
-            
-    # Remove common suffixes
-    suffixes = ['_field', '_input', '_box', '_text', '_value']
-    for suffix in suffixes:
-        if name.endswith(suffix):
-            name = name[:-len(suffix)]
-            
-    # Compress multiple spaces into one
-    name = re.sub(r'\s+', ' ', name)
-    
-    return name.strip()
-
-
-def get_field_patterns(field_name: str) -> Set[str]:
+    # Replace runs of special characters with a single space
+    return _NON_ALNUM_RE.sub(' ', field_name.lower()).strip()
+
+
+@lru_cache(maxsize=None)
+def get_field_patterns(field_name: str) -> FrozenSet[str]:
     """
     Get potential pattern matches for a field name
     
@@ -199,7 +287,7 @@ def get_field_patterns(field_name: str) -> Set[str]:
         field_name: The field name to match
         
     Returns:
-        Set of related terms for the field
+        Frozenset of related terms for the field (cached, so it is immutable)
     """
     related_terms = set()
     normalized = normalize_field_name(field_name)
@@ -213,11 +301,13 @@ def get_field_patterns(field_name: str) -> Set[str]:
             related_terms.add(word)
     
     # Check for pattern matches
-    for pattern, terms in FIELD_PATTERNS.items():
-        if re.search(pattern, normalized):
+    for match in _FIELD_PATTERNS_RE.finditer(normalized):
+        related_terms.update(_GROUP_TO_TERMS[match.lastgroup])
+    for pattern, terms in _UNFUSED_FIELD_PATTERNS:
+        if pattern.search(normalized):
             related_terms.update(terms)
     
-    return related_terms
+    return frozenset(related_terms)
 
 
 def calculate_similarity(source: str, target: str) -> float:
@@ -257,6 +347,7 @@ def calculate_similarity(source: str, target: str) -> float:
     return min(combined_score, 1.0)  # Cap at 1.0
 
 
+@lru_cache(maxsize=None)
 def categorize_transcript_field(field_name: str) -> str:
     """
     Categorize a transcript field name into one of the defined categories.
@@ -270,14 +361,24 @@ def categorize_transcript_field(field_name: str) -> str:
     # Normalize the field name
     norm_field = field_name.lower().strip()
     
-    # Check against each category's synonyms
-    for category, synonyms in FIELD_CATEGORIES.items():
-        for synonym in synonyms:
-            if synonym in norm_field or norm_field in synonym:
-                return category
+    if _HAS_AHOCORASICK:
+        # Earliest category with a synonym in the field name...
+        index = min((value for _, value in _TRANSCRIPT_AUTOMATON.iter(norm_field)),
+                    default=len(_TRANSCRIPT_CATEGORIES))
+        # ...or with a synonym containing the field name
+        position = _ALL_SYNONYMS.find(norm_field)
+        if position != -1:
+            index = min(index, bisect_right(_SYNONYM_OFFSETS, position) - 1)
+        return _TRANSCRIPT_CATEGORIES[index] if index < len(_TRANSCRIPT_CATEGORIES) else 'other'
+    
+    # Check against each category's synonyms - a synonym in the field name or the field name in a synonym
+    for category, synonym_re, joined_synonyms in _TRANSCRIPT_CATEGORY_MATCHERS:
+        if synonym_re.search(norm_field) or norm_field in joined_synonyms:
+            return category
     
     return 'other'
 
+@lru_cache(maxsize=None)
 def categorize_pdf_field(field_name: str) -> str:
     """
     Categorize a PDF field name into one of the defined categories.
@@ -291,11 +392,10 @@ def categorize_pdf_field(field_name: str) -> str:
     # Normalize the field name
     norm_field = field_name.lower().strip()
     
-    # Check against each category's patterns
-    for category, patterns in CATEGORY_TO_PDF_PATTERNS.items():
-        for pattern in patterns:
-            if any(word in norm_field for word in pattern.split('|')):
-                return category
+    # Search each category's patterns
+    for category, pattern_re in _PDF_CATEGORY_MATCHERS:
+        if pattern_re.search(norm_field):
+            return category
     
     return 'other'
 
@@ -316,18 +416,26 @@ def generate_field_mapping(pdf_path: str, transcript_fields: List[str], min_scor
     pdf_fields = analyzer.get_field_names()
     pdf_field_info = analyzer.get_all_fields_info()
     
+    # Work on unique field names (first occurrence order); repeats would only redo the same work
+    unique_transcript_fields = list(dict.fromkeys(transcript_fields))
+    unique_pdf_fields = list(dict.fromkeys(pdf_fields))
+    
     # Categorize transcript fields
     transcript_categories = {}
-    for field in transcript_fields:
+    transcript_field_categories = {}
+    for field in unique_transcript_fields:
         category = categorize_transcript_field(field)
+        transcript_field_categories[field] = category
         if category not in transcript_categories:
             transcript_categories[category] = []
         transcript_categories[category].append(field)
     
     # Categorize PDF fields
     pdf_categories = {}
-    for field in pdf_fields:
+    pdf_field_categories = {}
+    for field in unique_pdf_fields:
         category = categorize_pdf_field(field)
+        pdf_field_categories[field] = category
         if category not in pdf_categories:
             pdf_categories[category] = []
         pdf_categories[category].append(field)
@@ -340,18 +448,26 @@ def generate_field_mapping(pdf_path: str, transcript_fields: List[str], min_scor
         'total_pdf_fields': len(pdf_fields),
         'transcript_categories': transcript_categories,
         'pdf_categories': pdf_categories,
+        'deduplication': {
+            'unique_transcript_fields': len(unique_transcript_fields),
+            'unique_pdf_fields': len(unique_pdf_fields),
+            'transcript_dedup_ratio': round(1 - len(unique_transcript_fields) / len(transcript_fields), 4) if transcript_fields else 0,
+            'pdf_dedup_ratio': round(1 - len(unique_pdf_fields) / len(pdf_fields), 4) if pdf_fields else 0
+        },
         'mappings': {}
     }
     
     # Use the AI Field Mapper for the actual mapping
     field_mapper = AIFieldMapper(pdf_path, min_score=min_score)
-    mapping = field_mapper.generate_mapping(transcript_fields)
-    
-    # Add detailed mapping information
-    for transcript_field, pdf_field in mapping.items():
-        t_category = categorize_transcript_field(transcript_field)
-        p_category = categorize_pdf_field(pdf_field)
-        similarity = difflib.SequenceMatcher(None, transcript_field.lower(), pdf_field.lower()).ratio()
+    mapping_with_scores = field_mapper.generate_mapping_with_scores(unique_transcript_fields)
+    mapping = {t_field: p_field for t_field, (p_field, _) in mapping_with_scores.items()}
+    
+    # Add detailed mapping information, reusing the categories and the mapper's match scores
+    for transcript_field, (pdf_field, similarity) in mapping_with_scores.items():
+        t_category = transcript_field_categories[transcript_field]
+        p_category = pdf_field_categories.get(pdf_field)
+        if p_category is None:
+            p_category = categorize_pdf_field(pdf_field)
         
         mapping_details['mappings'][transcript_field] = {
             'transcript_field': transcript_field,
@@ -362,15 +478,17 @@ def generate_field_mapping(pdf_path: str, transcript_fields: List[str], min_scor
             'pdf_field_info': pdf_field_info.get(pdf_field, {})
         }
     
-    # Calculate coverage statistics
-    covered_fields = len(mapping)
+    # Calculate coverage statistics over every transcript field, like total_transcript_fields;
+    # repeated names share the mapping of their first occurrence
+    unmapped_fields = [f for f in transcript_fields if f not in mapping]
+    covered_fields = len(transcript_fields) - len(unmapped_fields)
     coverage_percent = round((covered_fields / len(transcript_fields) * 100), 2) if transcript_fields else 0
     
     mapping_details['coverage_statistics'] = {
         'mapped_fields': covered_fields,
-        'unmapped_fields': len(transcript_fields) - covered_fields,
+        'unmapped_fields': len(unmapped_fields),
         'coverage_percent': coverage_percent,
-        'unmapped_transcript_fields': [f for f in transcript_fields if f not in mapping]
+        'unmapped_transcript_fields': unmapped_fields
     }
     
     return {
@@ -378,6 +496,18 @@ def generate_field_mapping(pdf_path: str, transcript_fields: List[str], min_scor
         'details': mapping_details
     }
 
+def _orjson_default(obj: Any) -> Any:
+    """
+    Convert values orjson can't serialize natively
+    
+    pypdf's FloatObject (in every field's 'rect') subclasses float, and orjson
+    only accepts exact floats; the str, int and list subclasses pypdf uses are
+    serialized natively.
+    """
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 def load_transcript_fields(file_path: str) -> List[str]:
     """
     Load transcript fields from a JSON file
@@ -388,8 +518,12 @@ def load_transcript_fields(file_path: str) -> List[str]:
     Returns:
         List of transcript field names
     """
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+    if _HAS_ORJSON:
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
     
     # Handle different formats
     if isinstance(data, list):
@@ -445,9 +579,15 @@ def main():
         # Generate the mapping
         result = generate_field_mapping(pdf_path, transcript_fields, min_score)
         
-        # Save the mapping
-        with open(output_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        # Save the mapping - serialize before opening the file so a failure can't leave it truncated
+        if _HAS_ORJSON:
+            data = orjson.dumps(result, default=_orjson_default,
+                                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            with open(output_path, 'wb') as f:
+                f.write(data)
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(result, f, indent=2)
         
         # Print coverage statistics
         coverage = result['details']['coverage_statistics']
@@ -461,7 +601,7 @@ def main():
         # Print sample mappings
         print("\nSample Mappings:")
         sample_count = min(5, len(result['mapping']))
-        for i, (t_field, p_field) in enumerate(list(result['mapping'].items())[:sample_count]):
+        for i, (t_field, p_field) in enumerate(islice(result['mapping'].items(), sample_count)):
             print(f"  {t_field} → {p_field}")
         
         if len(result['mapping']) > sample_count:
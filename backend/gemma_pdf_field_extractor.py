@@ -12,18 +12,26 @@ import sys
 import json
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Optional fast JSON parser for the model output and the saved fields
+try:
+    import orjson
+    _HAS_ORJSON = True
+    _json_loads = orjson.loads
+except ImportError:
+    _HAS_ORJSON = False
+    _json_loads = json.loads
+_JSON_DECODER = json.JSONDecoder()  # Decodes one value at a time when recovering truncated output
 
-# Add api_processor directory to the Python path
 current_dir = Path(__file__).resolve().parent
 api_processor_dir = current_dir / 'api_processor'
-if str(api_processor_dir) not in sys.path:
-    sys.path.append(str(api_processor_dir))
-
-# Import the pdf_field_processor module
-from api_processor.pdf_field_processor import PDFFieldProcessor
 
 # Set up paths
 PDF_TEMPLATE_PATH = os.path.join(current_dir, 'media', 'pdf', 'uniform_residential_loan_application.pdf')
@@ -34,35 +42,121 @@ FILLED_PDF_PATH = os.path.join(OUTPUT_DIR, 'filled_loan_application.pdf')
 # Replace with your actual API endpoint for Gemma-3
 GEMMA_API_ENDPOINT = "http://localhost:8000/api/generate"  # Change this to your actual endpoint
 
+# Upper bound on parallel requests when several transcripts are extracted
+GEMMA_MAX_CONCURRENT_REQUESTS = 16
+
+# Connect and read timeouts (seconds) for the Gemma-3 API
+GEMMA_API_TIMEOUT = (3.05, 60)
+
+# Generation options sent with every prompt, pre-encoded as the tail of the JSON request body
+GEMMA_REQUEST_OPTIONS_JSON = b', "max_tokens": 2048, "temperature": 0.1}'
+
+# Minimum number of transcripts falling back to simulation before it is spread across processes
+_PARALLEL_MIN_TRANSCRIPTS = 8
+
+# One session per thread, so calls to the Gemma-3 API reuse kept-alive connections
+# without sharing a requests.Session between threads
+_SESSION_LOCAL = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """Get the calling thread's Gemma-3 API session, creating it on first use"""
+    session = getattr(_SESSION_LOCAL, 'session', None)
+    if session is None:
+        session = _SESSION_LOCAL.session = requests.Session()
+        session.mount(GEMMA_API_ENDPOINT, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+
+# Patterns used by simulate_extraction, compiled once at import
+NAME_RE = re.compile(r"my name is ([^.,!?]+)", re.IGNORECASE)
+SSN_RE = re.compile(r"\b\d{3}[-]?\d{2}[-]?\d{4}\b")
+DOB_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(\d{1,2})[/\-](\d{1,2})[/\-](\d{2,4})\b",  # MM/DD/YYYY or DD/MM/YYYY
+    r"\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})(?:rd|th|st|nd)?,?\s+(\d{4})\b",  # Month DD, YYYY
+    r"\b(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})\b"  # YYYY-MM-DD
+)]
+# Street-type keywords shared by the address patterns
+STREET_SUFFIX = r"(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)"
+# Ordered by priority; the first pattern that matches wins
+ADDRESS_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(\d+\s+[A-Za-z]+\s+" + STREET_SUFFIX + r"(?:\s*[A-Za-z0-9,]+)(?:\s*,\s*)?(?:Apt|Apartment|Unit|#)?\s*(?:[A-Za-z0-9]+)?(?:\s*,\s*)?(?:[A-Za-z]+\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?)",
+    r"\b(\d+\s+[A-Za-z]+\s+" + STREET_SUFFIX + r"(?:\s*[A-Za-z0-9,]+)?)"
+)]
+STREET_RE = re.compile(r"\b(\d+\s+[A-Za-z]+\s+" + STREET_SUFFIX + r"(?:\s*[A-Za-z0-9]+)?)", re.IGNORECASE)
+CITY_RE = re.compile(r"([A-Za-z\s]+)(?:\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?$", re.IGNORECASE)
+# State and zip share the trailing anchor, so one search yields both; the state
+# group is optional so a bare trailing zip still matches on its own.
+STATE_ZIP_RE = re.compile(r"(?:(?P<state>[A-Za-z]{2})\s*,?\s*)?(?P<zip>\d{5}(?:-\d{4})?)$")
+PHONE_RE = re.compile(r"\b(?:\+?1[-\s]?)?(?:\(?\d{3}\)?[-\s]?)?\d{3}[-\s]?\d{4}\b")
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+MARITAL_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:I am|I'm)\s+(single|married|unmarried|separated)",
+    r"marital status.*?(single|married|unmarried|separated)",
+    r"(single|married|unmarried|separated).*?marital status"
+)]
+EMPLOYER_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:I work|I am employed|I'm employed).*?(?:at|for|with)\s+([^.,;]+)",
+    r"(?:employer|company|firm).*?(?:is|called|named)\s+([^.,;]+)",
+    r"(?:I am a|I'm a).*?(?:at|for|with)\s+([^.,;]+)"
+)]
+JOB_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:position|title|role|job).*?(?:is|as)\s+([^.,;]+)",
+    r"(?:I am a|I'm a)\s+([^.,;]+?)\s+(?:at|for|with)"
+)]
+YEARS_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:been there|been working|employed).*?(?:for|since)\s+(\d+)\s+(?:years|year)",
+    r"(\d+)\s+(?:years|year).*?(?:with current employer|at this job|in this role|at this company)"
+)]
+INCOME_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:income|salary|make|earn|earning).*?(?:is|about|approximately|around)?\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K|,000)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?",
+    r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K|,000)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?.*?(?:income|salary|make|earn)"
+)]
+ADDITIONAL_INCOME_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:other income|additional income|extra income|also make).*?(?:is|about|approximately|around)?\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?",
+    r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?.*?(?:other income|additional income|extra income)"
+)]
+THOUSAND_RE = re.compile(r"\s*(?:thousand|k)\b", re.IGNORECASE)  # Unit right after an amount
+INCOME_SOURCE_RE = re.compile(r"(?:from|through|via|by)\s+([^.,;]+)", re.IGNORECASE)
+LOAN_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:loan|mortgage|borrow|finance).*?(?:for|amount|of|looking for)\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?",
+    r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?.*?(?:loan|mortgage|borrow|financing)"
+)]
+PURPOSE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:purpose|reason|want|looking).*?(?:loan|mortgage|financing|borrow|refinance).*?(?:is|for|to)\s+([^.,;]+)",
+    r"(?:buying|purchasing|refinancing|building|constructing)\s+([^.,;]+)"
+)]
+PROPERTY_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:property|house|home).*?(?:is located at|address is|located at)\s+([^.]+)",
+    r"(?:purchasing|buying|refinancing).*?(?:at|on|located at)\s+([^.]+)"
+)]
+SELF_EMPLOYED_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:self[- ]employed|own my own business|freelancer|independent contractor|business owner)",
+    r"(?:not self[- ]employed|work for someone else|employed by)"
+)]
+
 
 def parse_command_line():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Extract field data from text using Gemma-3')
-    parser.add_argument('--input', '-i', type=str, required=True, help='Path to the input transcript file')
+    parser.add_argument('--input', '-i', type=str, nargs='+', required=True,
+                        help='Path to the input transcript file (several are extracted concurrently)')
     parser.add_argument('--output', '-o', type=str, default=FILLED_PDF_PATH, help='Path for the filled PDF output')
     parser.add_argument('--json-output', '-j', type=str, help='Path to save the extracted JSON data')
     return parser.parse_args()
 
 
+@lru_cache(maxsize=1)
 def read_field_guide():
-    """Read the AI field guide to understand the field structure"""
+    """Read the AI field guide to understand the field structure (read from disk once)"""
     with open(AI_FIELD_GUIDE_PATH, 'r') as f:
         return f.read()
 
 
-def extract_fields_with_gemma(transcript_text: str, field_guide: str) -> List[Dict[str, Any]]:
-    """
-    Extract field data from text using Gemma-3
-    
-    Args:
-        transcript_text: The input transcript text
-        field_guide: The field guide content
-        
-    Returns:
-        List of dictionaries with field_name, value, and confidence
-    """
-    # Prepare the prompt
-    prompt = f"""
+# Static part of the prompt. Everything that doesn't depend on the transcript comes
+# first and stays byte-identical between calls, so servers with prefix caching only
+# prefill the transcript.
+PROMPT_INSTRUCTIONS = """
 You are a specialized PDF form field extractor. Your task is to extract field data from the provided transcript 
 and return it in a structured JSON format that can be used to fill out a Uniform Residential Loan Application form.
 
@@ -72,30 +166,138 @@ containing 'field_name', 'value', and 'confidence' (0-100).
 For checkbox fields, use "Yes" or "No" as the value.
 For radio button groups, use the format "Group Name: Option" with "Yes" as the value.
 
-Here's a section of the field guide for reference:
-{field_guide[:2000]}  # Only include the beginning to keep the prompt short
-
-Now, extract the fields from the following transcript:
-
-{transcript_text}
-
 Output ONLY a valid JSON array with the extracted fields in the format:
 [
-  {{"field_name": "Field Name", "value": "Field Value", "confidence": confidence_score}},
+  {"field_name": "Field Name", "value": "Field Value", "confidence": confidence_score},
   ...
 ]
+
+Here's a section of the field guide for reference:
 """
 
+# Only the beginning of the field guide is included to keep the prompt short
+FIELD_GUIDE_PROMPT_LENGTH = 2000
+
+
+@lru_cache(maxsize=4)
+def build_system_prompt(field_guide: str) -> str:
+    """
+    Build the transcript-independent prefix of the extraction prompt
+    
+    Args:
+        field_guide: The field guide content
+        
+    Returns:
+        The prompt prefix, identical for every transcript
+    """
+    return (PROMPT_INSTRUCTIONS + field_guide[:FIELD_GUIDE_PROMPT_LENGTH] +
+            "\n\nNow, extract the fields from the following transcript:\n\n")
+
+
+@lru_cache(maxsize=4)
+def _encoded_system_prompt(field_guide: str) -> bytes:
+    """JSON-encoded prompt prefix: the opening quote and escaped text, without the closing quote"""
+    return json.dumps(build_system_prompt(field_guide))[:-1].encode('ascii')
+
+
+def build_prompt_json(transcript_text: str, field_guide: str) -> bytes:
+    """
+    Build the extraction prompt for a transcript as an encoded JSON string
+    
+    Only the transcript is escaped per call; the static prefix is encoded once.
+    
+    Args:
+        transcript_text: The input transcript text
+        field_guide: The field guide content
+        
+    Returns:
+        The prompt to send to Gemma-3, as a quoted JSON string literal
+    """
+    return _encoded_system_prompt(field_guide) + json.dumps(transcript_text)[1:-1].encode('ascii') + b'\\n"'
+
+
+def _recover_json_objects(extracted_text: str, start_idx: int) -> List[Dict[str, Any]]:
+    """
+    Decode the complete objects of a JSON array one at a time, stopping at the first
+    incomplete or invalid one (e.g. when the output was cut off by max_tokens)
+    
+    Args:
+        extracted_text: The text generated by Gemma-3
+        start_idx: Index of the array's opening bracket
+        
+    Returns:
+        List of the objects decoded before the array ended or broke off
+    """
+    objects = []
+    pos = start_idx + 1
+    length = len(extracted_text)
+    while True:
+        while pos < length and extracted_text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= length or extracted_text[pos] == ']':
+            break
+        try:
+            obj, pos = _JSON_DECODER.raw_decode(extracted_text, pos)
+        except json.JSONDecodeError:
+            break
+        objects.append(obj)
+    return objects
+
+
+def parse_gemma_output(extracted_text: str) -> List[Dict[str, Any]]:
+    """
+    Parse the JSON array of extracted fields out of the model's output text
+    
+    Args:
+        extracted_text: The text generated by Gemma-3
+        
+    Returns:
+        List of dictionaries with field_name, value, and confidence
+    """
+    # Try to find JSON array in the text
+    start_idx = extracted_text.find('[')
+    if start_idx < 0:
+        print(f"No JSON array found in API response: {extracted_text}")
+        return []
+    
+    end_idx = extracted_text.rfind(']') + 1
+    if end_idx > start_idx:
+        json_str = extracted_text[start_idx:end_idx]
+        try:
+            return _json_loads(json_str)
+        except ValueError:
+            pass
+    
+    # Truncated or malformed array - keep the fields that were completed
+    fields = _recover_json_objects(extracted_text, start_idx)
+    if fields:
+        print(f"Recovered {len(fields)} fields from an incomplete JSON array in the API response")
+    else:
+        print(f"Error parsing JSON from API response: {extracted_text[start_idx:]}")
+    return fields
+
+
+def extract_fields_with_gemma(transcript_text: str, field_guide: str) -> List[Dict[str, Any]]:
+    """
+    Extract field data from text using Gemma-3
+    
+    Args:
+        transcript_text: The input transcript text
+        field_guide: The field guide content
+        
+    Returns:
+        List of dictionaries with field_name, value, and confidence
+    """
+    # Prepare the request body around the pre-encoded prompt
+    body = b'{"prompt": ' + build_prompt_json(transcript_text, field_guide) + GEMMA_REQUEST_OPTIONS_JSON
+
     try:
         # Call Gemma-3 API
-        response = requests.post(
+        response = _get_session().post(
             GEMMA_API_ENDPOINT,
-            json={
-                "prompt": prompt,
-                "max_tokens": 2048,
-                "temperature": 0.1
-            },
-            headers={"Content-Type": "application/json"}
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=GEMMA_API_TIMEOUT
         )
         
         if response.status_code == 200:
@@ -103,22 +305,7 @@ Output ONLY a valid JSON array with the extracted fields in the format:
             # Extract JSON from the response
             # This assumes the model outputs a JSON array directly
             # You might need to adjust this based on your API's response format
-            extracted_text = result.get('text', '')
-            
-            # Try to find JSON array in the text
-            start_idx = extracted_text.find('[')
-            end_idx = extracted_text.rfind(']') + 1
-            
-            if start_idx >= 0 and end_idx > start_idx:
-                json_str = extracted_text[start_idx:end_idx]
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    print(f"Error parsing JSON from API response: {json_str}")
-                    return []
-            else:
-                print(f"No JSON array found in API response: {extracted_text}")
-                return []
+            return parse_gemma_output(result.get('text', ''))
         else:
             print(f"API request failed with status code: {response.status_code}")
             print(f"Response: {response.text}")
@@ -129,6 +316,53 @@ Output ONLY a valid JSON array with the extracted fields in the format:
         return []
 
 
+def extract_fields_with_gemma_concurrent(transcripts: List[str], field_guide: str) -> List[List[Dict[str, Any]]]:
+    """
+    Extract field data from several transcripts with concurrent Gemma-3 requests
+    
+    Each transcript is sent to the regular endpoint on its own; the requests run
+    on a thread pool, each thread with its own session.
+    
+    Args:
+        transcripts: The input transcript texts
+        field_guide: The field guide content
+        
+    Returns:
+        One list of dictionaries with field_name, value, and confidence per transcript
+    """
+    # The first request runs alone so it seeds the server's cache of the shared prompt prefix
+    results = [extract_fields_with_gemma(transcripts[0], field_guide)]
+    with ThreadPoolExecutor(max_workers=min(len(transcripts), GEMMA_MAX_CONCURRENT_REQUESTS)) as executor:
+        results.extend(executor.map(lambda transcript_text: extract_fields_with_gemma(transcript_text, field_guide),
+                                    transcripts[1:]))
+    return results
+
+
+def _field(field_name: str, value: Any, confidence: int = 100) -> Dict[str, Any]:
+    """Build one extracted field entry in the shape the PDF filler expects."""
+    return {"field_name": field_name, "value": value, "confidence": confidence}
+
+
+def _address_parts(address: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    Split an address string into street, city, state and zip code.
+
+    Args:
+        address: Address text captured from the transcript
+
+    Returns:
+        Tuple of (street, city, state, zip_code); parts that were not found are None
+    """
+    street_match = STREET_RE.search(address)
+    city_match = CITY_RE.search(address)
+    state_zip_match = STATE_ZIP_RE.search(address)
+    street = street_match.group(1) if street_match else None
+    city = city_match.group(1).strip() if city_match else None
+    state = state_zip_match.group('state') if state_zip_match else None
+    zip_code = state_zip_match.group('zip') if state_zip_match else None
+    return street, city, state, zip_code
+
+
 def simulate_extraction(transcript_text: str) -> List[Dict[str, Any]]:
     """
     Simulate field extraction for testing when API is not available
@@ -140,356 +374,268 @@ def simulate_extraction(transcript_text: str) -> List[Dict[str, Any]]:
         List of dictionaries with field_name, value, and confidence
     """
     # This is a simulation that extracts fields from the transcript text
-    fields = []
+    # Field name -> (value, confidence); entries are built once the extraction is done
+    fields_map: Dict[str, Tuple[Any, int]] = {}
+    text_lower = transcript_text.lower()
     
     # Extract name
-    if "my name is" in transcript_text.lower():
+    if "my name is" in text_lower:
         for line in transcript_text.split("\n"):
             if "my name is" in line.lower():
-                name_match = re.search(r"my name is ([^.,!?]+)", line, re.IGNORECASE)
+                name_match = NAME_RE.search(line)
                 if name_match:
                     full_name = name_match.group(1).strip()
                     
                     # Try to split into first, middle, last
                     name_parts = full_name.split()
                     if len(name_parts) >= 3:
-                        fields.append({"field_name": "Borrower First Name", "value": name_parts[0], "confidence": 100})
-                        fields.append({"field_name": "Borrower Middle Name", "value": name_parts[1], "confidence": 100})
-                        fields.append({"field_name": "Borrower Last Name", "value": ' '.join(name_parts[2:]), "confidence": 100})
+                        fields_map["Borrower First Name"] = (name_parts[0], 100)
+                        fields_map["Borrower Middle Name"] = (name_parts[1], 100)
+                        fields_map["Borrower Last Name"] = (' '.join(name_parts[2:]), 100)
                     elif len(name_parts) == 2:
-                        fields.append({"field_name": "Borrower First Name", "value": name_parts[0], "confidence": 100})
-                        fields.append({"field_name": "Borrower Last Name", "value": name_parts[1], "confidence": 100})
+                        fields_map["Borrower First Name"] = (name_parts[0], 100)
+                        fields_map["Borrower Last Name"] = (name_parts[1], 100)
                     else:
-                        fields.append({"field_name": "Borrower Name", "value": full_name, "confidence": 100})
+                        fields_map["Borrower Name"] = (full_name, 100)
                     
-                    fields.append({"field_name": "Borrower Suffix", "value": "Not Found", "confidence": 90})
+                    fields_map["Borrower Suffix"] = ("Not Found", 90)
                     break
     
     # Extract SSN
-    ssn_pattern = r"\b\d{3}[-]?\d{2}[-]?\d{4}\b"
-    ssn_matches = re.findall(ssn_pattern, transcript_text)
-    if ssn_matches:
-        fields.append({"field_name": "Borrower SSN", "value": ssn_matches[0], "confidence": 80})
-        fields.append({"field_name": "Social Security Number", "value": ssn_matches[0], "confidence": 80})
+    ssn_match = SSN_RE.search(transcript_text)
+    if ssn_match:
+        fields_map["Borrower SSN"] = (ssn_match.group(), 80)
+        fields_map["Social Security Number"] = (ssn_match.group(), 80)
     
     # Extract DOB
-    dob_patterns = [
-        r"\b(\d{1,2})[/\-](\d{1,2})[/\-](\d{2,4})\b",  # MM/DD/YYYY or DD/MM/YYYY
-        r"\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})(?:rd|th|st|nd)?,?\s+(\d{4})\b",  # Month DD, YYYY
-        r"\b(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})\b"  # YYYY-MM-DD
-    ]
-    
-    for pattern in dob_patterns:
-        dob_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if dob_matches:
-            # Format as YYYY-MM-DD
-            if re.match(r"\b\d{4}[/\-]\d{1,2}[/\-]\d{1,2}\b", dob_matches[0][0] + "-" + dob_matches[0][1] + "-" + dob_matches[0][2]):
-                dob = f"{dob_matches[0][0]}-{dob_matches[0][1].zfill(2)}-{dob_matches[0][2].zfill(2)}"
+    for pattern in DOB_RES:
+        dob_match = pattern.search(transcript_text)
+        if dob_match:
+            first, second, third = dob_match.groups()
+            # Format as YYYY-MM-DD; only the year-first pattern captures a four-digit number first
+            # (month names such as "June" are four characters too)
+            if first.isdecimal() and len(first) == 4:
+                dob = f"{first}-{second.zfill(2)}-{third.zfill(2)}"
             else:
-                dob = f"{dob_matches[0][2]}-{dob_matches[0][0].zfill(2)}-{dob_matches[0][1].zfill(2)}"
-            fields.append({"field_name": "Borrower DOB", "value": dob, "confidence": 100})
-            fields.append({"field_name": "Date of Birth", "value": dob, "confidence": 100})
+                dob = f"{third}-{first.zfill(2)}-{second.zfill(2)}"
+            fields_map["Borrower DOB"] = (dob, 100)
+            fields_map["Date of Birth"] = (dob, 100)
             break
     
     # Extract address
-    address_patterns = [
-        r"\b(\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)(?:\s*[A-Za-z0-9,]+)(?:\s*,\s*)?(?:Apt|Apartment|Unit|#)?\s*(?:[A-Za-z0-9]+)?(?:\s*,\s*)?(?:[A-Za-z]+\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?)",
-        r"\b(\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)(?:\s*[A-Za-z0-9,]+)?)",
-        r"\b(I live at\s+(?:\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)(?:\s*[A-Za-z0-9,]+)(?:\s*,\s*)?(?:Apt|Apartment|Unit|#)?\s*(?:[A-Za-z0-9]+)?(?:\s*,\s*)?(?:[A-Za-z]+\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?))"
-    ]
-    
     full_address = None
-    for pattern in address_patterns:
-        address_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if address_matches:
-            full_address = address_matches[0]
+    for pattern in ADDRESS_RES:
+        address_match = pattern.search(transcript_text)
+        if address_match:
+            full_address = address_match.group(1)
             break
             
     # If address found, split it into parts
     if full_address:
         # Try to extract the parts
-        street_match = re.search(r"\b(\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)(?:\s*[A-Za-z0-9]+)?)", full_address, re.IGNORECASE)
-        if street_match:
-            street = street_match.group(1)
-            fields.append({"field_name": "Borrower Present Address", "value": full_address, "confidence": 100})
-            fields.append({"field_name": "Current Street Address", "value": street, "confidence": 100})
-        
-        # City
-        city_match = re.search(r"([A-Za-z\s]+)(?:\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?$", full_address, re.IGNORECASE)
-        if city_match:
-            city = city_match.group(1).strip()
-            fields.append({"field_name": "Current City", "value": city, "confidence": 100})
-        
-        # State
-        state_match = re.search(r"([A-Za-z]{2})\s*,?\s*\d{5}(?:-\d{4})?$", full_address, re.IGNORECASE)
-        if state_match:
-            state = state_match.group(1).strip()
-            fields.append({"field_name": "Current State", "value": state, "confidence": 100})
-        
-        # Zip
-        zip_match = re.search(r"(\d{5}(?:-\d{4})?)$", full_address, re.IGNORECASE)
-        if zip_match:
-            zip_code = zip_match.group(1).strip()
-            fields.append({"field_name": "Current Zip Code", "value": zip_code, "confidence": 100})
+        street, city, state, zip_code = _address_parts(full_address)
+        if street:
+            fields_map["Borrower Present Address"] = (full_address, 100)
+            fields_map["Current Street Address"] = (street, 100)
+        if city is not None:
+            fields_map["Current City"] = (city, 100)
+        if state:
+            fields_map["Current State"] = (state, 100)
+        if zip_code:
+            fields_map["Current Zip Code"] = (zip_code, 100)
     
     # Extract phone number
-    phone_pattern = r"\b(?:\+?1[-\s]?)?(?:\(?\d{3}\)?[-\s]?)?\d{3}[-\s]?\d{4}\b"
-    phone_matches = re.findall(phone_pattern, transcript_text)
-    if phone_matches:
-        fields.append({"field_name": "Borrower Home Phone", "value": phone_matches[0], "confidence": 100})
-        fields.append({"field_name": "Primary Phone Number", "value": phone_matches[0], "confidence": 100})
+    phone_match = PHONE_RE.search(transcript_text)
+    if phone_match:
+        fields_map["Borrower Home Phone"] = (phone_match.group(), 100)
+        fields_map["Primary Phone Number"] = (phone_match.group(), 100)
     
     # Extract email
-    email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-    email_matches = re.findall(email_pattern, transcript_text)
-    if email_matches:
-        fields.append({"field_name": "Text1", "value": email_matches[0], "confidence": 100})
-        fields.append({"field_name": "Email Address", "value": email_matches[0], "confidence": 100})
+    email_match = EMAIL_RE.search(transcript_text)
+    if email_match:
+        fields_map["Text1"] = (email_match.group(), 100)
+        fields_map["Email Address"] = (email_match.group(), 100)
     
     # Extract marital status
-    marital_status_patterns = [
-        r"(?:I am|I'm)\s+(single|married|unmarried|separated)",
-        r"marital status.*?(single|married|unmarried|separated)",
-        r"(single|married|unmarried|separated).*?marital status"
-    ]
-    
     marital_status = None
-    for pattern in marital_status_patterns:
-        marital_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if marital_matches:
-            marital_status = marital_matches[0].strip().lower()
+    for pattern in MARITAL_RES:
+        marital_match = pattern.search(transcript_text)
+        if marital_match:
+            marital_status = marital_match.group(1).strip().lower()
             break
             
     if marital_status:
-        fields.append({"field_name": "Borrower Marital Status", "value": marital_status.capitalize(), "confidence": 95})
-        fields.append({"field_name": "Marital Status", "value": marital_status.capitalize(), "confidence": 95})
+        fields_map["Borrower Marital Status"] = (marital_status.capitalize(), 95)
+        fields_map["Marital Status"] = (marital_status.capitalize(), 95)
         
         # Add checkbox format for marital status
-        if marital_status.lower() == "married":
-            fields.append({"field_name": "Borrower Marital Status: Married", "value": "Yes", "confidence": 95})
-        elif marital_status.lower() in ["single", "unmarried"]:
-            fields.append({"field_name": "Borrower Marital Status: Unmarried", "value": "Yes", "confidence": 95})
-        elif marital_status.lower() == "separated":
-            fields.append({"field_name": "Borrower Marital Status: Separated", "value": "Yes", "confidence": 95})
+        if marital_status == "married":
+            fields_map["Borrower Marital Status: Married"] = ("Yes", 95)
+        elif marital_status in ("single", "unmarried"):
+            fields_map["Borrower Marital Status: Unmarried"] = ("Yes", 95)
+        elif marital_status == "separated":
+            fields_map["Borrower Marital Status: Separated"] = ("Yes", 95)
     
     # Extract employer information
-    employer_patterns = [
-        r"(?:I work|I am employed|I'm employed).*?(?:at|for|with)\s+([^.,;]+)",
-        r"(?:employer|company|firm).*?(?:is|called|named)\s+([^.,;]+)",
-        r"(?:I am a|I'm a).*?(?:at|for|with)\s+([^.,;]+)"
-    ]
-    
     employer = None
-    for pattern in employer_patterns:
-        employer_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if employer_matches:
-            employer = employer_matches[0].strip()
+    for pattern in EMPLOYER_RES:
+        employer_match = pattern.search(transcript_text)
+        if employer_match:
+            employer = employer_match.group(1).strip()
             break
     
     if employer:
-        fields.append({"field_name": "Borrower Name and Address of Employer", "value": employer, "confidence": 100})
-        fields.append({"field_name": "Current Employer Name", "value": employer, "confidence": 100})
+        fields_map["Borrower Name and Address of Employer"] = (employer, 100)
+        fields_map["Current Employer Name"] = (employer, 100)
     
     # Extract job title
-    job_patterns = [
-        r"(?:position|title|role|job).*?(?:is|as)\s+([^.,;]+)",
-        r"(?:I am a|I'm a)\s+([^.,;]+?)\s+(?:at|for|with)"
-    ]
-    
     job_title = None
-    for pattern in job_patterns:
-        job_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if job_matches:
-            job_title = job_matches[0].strip()
+    for pattern in JOB_RES:
+        job_match = pattern.search(transcript_text)
+        if job_match:
+            job_title = job_match.group(1).strip()
             break
     
     if job_title:
-        fields.append({"field_name": "Borrower Position/Title/Type of Business", "value": job_title, "confidence": 100})
-        fields.append({"field_name": "Job Title/Position", "value": job_title, "confidence": 100})
+        fields_map["Borrower Position/Title/Type of Business"] = (job_title, 100)
+        fields_map["Job Title/Position"] = (job_title, 100)
     
     # Extract years of employment
-    years_patterns = [
-        r"(?:been there|been working|employed).*?(?:for|since)\s+(\d+)\s+(?:years|year)",
-        r"(\d+)\s+(?:years|year).*?(?:with current employer|at this job|in this role|at this company)"
-    ]
-    
     years_employment = None
-    for pattern in years_patterns:
-        years_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if years_matches:
-            years_employment = years_matches[0].strip()
+    for pattern in YEARS_RES:
+        years_match = pattern.search(transcript_text)
+        if years_match:
+            years_employment = years_match.group(1).strip()
             break
     
     if years_employment:
-        fields.append({"field_name": "Borrower Years on the job", "value": years_employment, "confidence": 75})
-        fields.append({"field_name": "Employment Start Date", "value": f"{years_employment} years", "confidence": 75})
+        fields_map["Borrower Years on the job"] = (years_employment, 75)
+        fields_map["Employment Start Date"] = (f"{years_employment} years", 75)
     
     # Extract income
-    income_patterns = [
-        r"(?:income|salary|make|earn|earning).*?(?:is|about|approximately|around)?\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K|,000)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?",
-        r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K|,000)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?.*?(?:income|salary|make|earn)"
-    ]
-    
     income = None
-    for pattern in income_patterns:
-        income_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if income_matches:
-            income = income_matches[0].strip().replace(",", "")
+    for pattern in INCOME_RES:
+        income_match = pattern.search(transcript_text)
+        if income_match:
+            income = income_match.group(1).strip().replace(",", "")
             # Check if it's followed by "thousand" or "k"
-            if "thousand" in transcript_text.lower() or "k" in transcript_text.lower():
+            if THOUSAND_RE.match(transcript_text, income_match.end(1)):
                 income = str(float(income) * 1000)
             break
     
     if income:
         # Check if it's annual or monthly
-        if "year" in transcript_text.lower() or "annual" in transcript_text.lower():
+        if "year" in text_lower or "annual" in text_lower:
             # Convert to monthly
             monthly_income = str(float(income) / 12)
-            fields.append({"field_name": "Monthly income Borrower Base a", "value": monthly_income, "confidence": 100})
-            fields.append({"field_name": "Monthly Income (Base)", "value": f"${monthly_income}", "confidence": 100})
+            fields_map["Monthly income Borrower Base a"] = (monthly_income, 100)
+            fields_map["Monthly Income (Base)"] = (f"${monthly_income}", 100)
         else:
-            fields.append({"field_name": "Monthly income Borrower Base a", "value": income, "confidence": 100})
-            fields.append({"field_name": "Monthly Income (Base)", "value": f"${income}", "confidence": 100})
+            fields_map["Monthly income Borrower Base a"] = (income, 100)
+            fields_map["Monthly Income (Base)"] = (f"${income}", 100)
     
     # Extract additional income
-    additional_income_patterns = [
-        r"(?:other income|additional income|extra income|also make).*?(?:is|about|approximately|around)?\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?",
-        r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?(?:per|a|each)?\s*(?:year|yearly|annually|month|monthly)?.*?(?:other income|additional income|extra income)"
-    ]
-    
     additional_income = None
     additional_income_source = None
     
-    for pattern in additional_income_patterns:
-        additional_income_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if additional_income_matches:
-            additional_income = additional_income_matches[0].strip().replace(",", "")
+    for pattern in ADDITIONAL_INCOME_RES:
+        additional_income_match = pattern.search(transcript_text)
+        if additional_income_match:
+            additional_income = additional_income_match.group(1).strip().replace(",", "")
             # Extract the source of additional income
-            source_match = re.search(r"(?:from|through|via|by)\s+([^.,;]+)", transcript_text, re.IGNORECASE)
+            source_match = INCOME_SOURCE_RE.search(transcript_text)
             if source_match:
                 additional_income_source = source_match.group(1).strip()
             break
     
     if additional_income:
         if additional_income_source:
-            fields.append({"field_name": "Monthly income Borrower Other a21", "value": additional_income, "confidence": 80})
-            fields.append({"field_name": "Monthly Income (Other, specify source if possible)", "value": f"${additional_income} ({additional_income_source})", "confidence": 80})
+            fields_map["Monthly income Borrower Other a21"] = (additional_income, 80)
+            fields_map["Monthly Income (Other, specify source if possible)"] = (f"${additional_income} ({additional_income_source})", 80)
         else:
-            fields.append({"field_name": "Monthly income Borrower Other a21", "value": additional_income, "confidence": 80})
-            fields.append({"field_name": "Monthly Income (Other, specify source if possible)", "value": f"${additional_income}", "confidence": 80})
+            fields_map["Monthly income Borrower Other a21"] = (additional_income, 80)
+            fields_map["Monthly Income (Other, specify source if possible)"] = (f"${additional_income}", 80)
     
     # Extract loan amount
-    loan_patterns = [
-        r"(?:loan|mortgage|borrow|finance).*?(?:for|amount|of|looking for)\s+\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?",
-        r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)\s*(?:thousand|k|K)?.*?(?:loan|mortgage|borrow|financing)"
-    ]
-    
     loan_amount = None
-    for pattern in loan_patterns:
-        loan_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if loan_matches:
-            loan_amount = loan_matches[0].strip().replace(",", "")
+    for pattern in LOAN_RES:
+        loan_match = pattern.search(transcript_text)
+        if loan_match:
+            loan_amount = loan_match.group(1).strip().replace(",", "")
             # Check if it's followed by "thousand" or "k"
-            if "thousand" in transcript_text.lower() or "k" in transcript_text.lower():
+            if THOUSAND_RE.match(transcript_text, loan_match.end(1)):
                 loan_amount = str(float(loan_amount) * 1000)
             break
     
     if loan_amount:
-        fields.append({"field_name": "Loan Amount", "value": loan_amount, "confidence": 100})
-        fields.append({"field_name": "Amount", "value": loan_amount, "confidence": 100})
-        fields.append({"field_name": "Loan Amount Requested", "value": f"${loan_amount}", "confidence": 100})
+        fields_map["Loan Amount"] = (loan_amount, 100)
+        fields_map["Amount"] = (loan_amount, 100)
+        fields_map["Loan Amount Requested"] = (f"${loan_amount}", 100)
     
     # Extract loan purpose
-    purpose_patterns = [
-        r"(?:purpose|reason|want|looking).*?(?:loan|mortgage|financing|borrow|refinance).*?(?:is|for|to)\s+([^.,;]+)",
-        r"(?:buying|purchasing|refinancing|building|constructing)\s+([^.,;]+)"
-    ]
-    
     loan_purpose = None
-    for pattern in purpose_patterns:
-        purpose_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if purpose_matches:
-            loan_purpose = purpose_matches[0].strip()
+    for pattern in PURPOSE_RES:
+        purpose_match = pattern.search(transcript_text)
+        if purpose_match:
+            loan_purpose = purpose_match.group(1).strip()
             break
     
     if loan_purpose:
         # Normalize the purpose
-        if "buy" in loan_purpose.lower() or "purchas" in loan_purpose.lower():
+        purpose_lower = loan_purpose.lower()
+        if "buy" in purpose_lower or "purchas" in purpose_lower:
             normalized_purpose = "Purchase"
-        elif "refinanc" in loan_purpose.lower():
+        elif "refinanc" in purpose_lower:
             normalized_purpose = "Refinance"
-        elif "build" in loan_purpose.lower() or "construct" in loan_purpose.lower():
+        elif "build" in purpose_lower or "construct" in purpose_lower:
             normalized_purpose = "Construction"
         else:
             normalized_purpose = "Other"
             
-        fields.append({"field_name": "Purpose of Loan", "value": normalized_purpose, "confidence": 100})
-        fields.append({"field_name": "Loan Purpose", "value": normalized_purpose, "confidence": 100})
+        fields_map["Purpose of Loan"] = (normalized_purpose, 100)
+        fields_map["Loan Purpose"] = (normalized_purpose, 100)
         
         # Add checkbox format for purpose
-        fields.append({"field_name": f"Purpose of Loan: {normalized_purpose}", "value": "Yes", "confidence": 100})
+        fields_map[f"Purpose of Loan: {normalized_purpose}"] = ("Yes", 100)
     
     # Extract property address (if different from current)
-    property_patterns = [
-        r"(?:property|house|home).*?(?:is located at|address is|located at)\s+([^.]+)",
-        r"(?:purchasing|buying|refinancing).*?(?:at|on|located at)\s+([^.]+)"
-    ]
-    
     property_address = None
-    for pattern in property_patterns:
-        property_matches = re.findall(pattern, transcript_text, re.IGNORECASE)
-        if property_matches:
-            property_address = property_matches[0].strip()
+    for pattern in PROPERTY_RES:
+        property_match = pattern.search(transcript_text)
+        if property_match:
+            property_address = property_match.group(1).strip()
             break
     
     if property_address and property_address != full_address:
-        fields.append({"field_name": "Subject Property Address", "value": property_address, "confidence": 100})
+        fields_map["Subject Property Address"] = (property_address, 100)
         
         # Try to extract property address parts
-        prop_street_match = re.search(r"\b(\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Circle|Cir|Court|Ct|Place|Pl|Terrace|Ter|Way|Parkway|Pkwy)(?:\s*[A-Za-z0-9]+)?)", property_address, re.IGNORECASE)
-        if prop_street_match:
-            prop_street = prop_street_match.group(1)
-            fields.append({"field_name": "Property Street Address (if different from current, or for purchase)", "value": prop_street, "confidence": 100})
-        
-        # Property City
-        prop_city_match = re.search(r"([A-Za-z\s]+)(?:\s*,\s*[A-Za-z]{2}\s*,?\s*\d{5}(?:-\d{4})?)?$", property_address, re.IGNORECASE)
-        if prop_city_match:
-            prop_city = prop_city_match.group(1).strip()
-            fields.append({"field_name": "Property City (if different from current, or for purchase)", "value": prop_city, "confidence": 100})
-        
-        # Property State
-        prop_state_match = re.search(r"([A-Za-z]{2})\s*,?\s*\d{5}(?:-\d{4})?$", property_address, re.IGNORECASE)
-        if prop_state_match:
-            prop_state = prop_state_match.group(1).strip()
-            fields.append({"field_name": "Property State (if different from current, or for purchase)", "value": prop_state, "confidence": 100})
-        
-        # Property Zip
-        prop_zip_match = re.search(r"(\d{5}(?:-\d{4})?)$", property_address, re.IGNORECASE)
-        if prop_zip_match:
-            prop_zip = prop_zip_match.group(1).strip()
-            fields.append({"field_name": "Property Zip Code (if different from current, or for purchase)", "value": prop_zip, "confidence": 100})
+        prop_street, prop_city, prop_state, prop_zip = _address_parts(property_address)
+        if prop_street:
+            fields_map["Property Street Address (if different from current, or for purchase)"] = (prop_street, 100)
+        if prop_city is not None:
+            fields_map["Property City (if different from current, or for purchase)"] = (prop_city, 100)
+        if prop_state:
+            fields_map["Property State (if different from current, or for purchase)"] = (prop_state, 100)
+        if prop_zip:
+            fields_map["Property Zip Code (if different from current, or for purchase)"] = (prop_zip, 100)
             
     # Extract self-employment status
-    self_employed_patterns = [
-        r"(?:self[- ]employed|own my own business|freelancer|independent contractor|business owner)",
-        r"(?:not self[- ]employed|work for someone else|employed by)"
-    ]
-    
     is_self_employed = False
-    for pattern in self_employed_patterns:
-        if re.search(pattern, transcript_text, re.IGNORECASE):
-            is_self_employed = "self" in pattern.lower()
+    for pattern in SELF_EMPLOYED_RES:
+        if pattern.search(transcript_text):
+            is_self_employed = "self" in pattern.pattern.lower()
             break
     
     if is_self_employed is not None:
-        fields.append({"field_name": "Borrower Self Employed", "value": "Yes" if is_self_employed else "No", "confidence": 90})
+        fields_map["Borrower Self Employed"] = ("Yes" if is_self_employed else "No", 90)
     
     # Add default for checkbox fields we didn't find
     # This ensures the UI shows them, even if not checked
-    if not any(field["field_name"] == "Borrower Self Employed" for field in fields):
-        fields.append({"field_name": "Borrower Self Employed", "value": "No", "confidence": 90})
+    if "Borrower Self Employed" not in fields_map:
+        fields_map["Borrower Self Employed"] = ("No", 90)
     
-    return fields
+    return [_field(field_name, value, confidence) for field_name, (value, confidence) in fields_map.items()]
 
 
 def fill_pdf_with_extracted_data(extracted_fields: List[Dict[str, Any]], output_path: str):
@@ -506,6 +652,12 @@ def fill_pdf_with_extracted_data(extracted_fields: List[Dict[str, Any]], output_
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
+    # Import the pdf_field_processor module only when a PDF is actually filled,
+    # adding the api_processor directory to the Python path first
+    if str(api_processor_dir) not in sys.path:
+        sys.path.append(str(api_processor_dir))
+    from api_processor.pdf_field_processor import PDFFieldProcessor
+    
     # Initialize PDF processor
     processor = PDFFieldProcessor(PDF_TEMPLATE_PATH)
     
@@ -517,40 +669,55 @@ def fill_pdf_with_extracted_data(extracted_fields: List[Dict[str, Any]], output_
     return filled_pdf_path
 
 
-def main():
-    """Main function"""
-    args = parse_command_line()
-    
-    # Read input transcript
-    try:
-        with open(args.input, 'r') as f:
-            transcript_text = f.read()
-    except FileNotFoundError:
-        print(f"Error: Input file not found at {args.input}")
-        return 1
+def output_paths_for_inputs(path: str, input_paths: List[str]) -> List[str]:
+    """
+    Give each input its own output file when several transcripts are processed
     
-    # Read the field guide
-    field_guide = read_field_guide()
+    Outputs are named after the input's file stem. Inputs sharing a stem (e.g. the
+    same file name in two directories) also get their position in the input list,
+    so no output overwrites another.
     
-    # Extract fields from transcript
-    try:
-        extracted_fields = extract_fields_with_gemma(transcript_text, field_guide)
+    Args:
+        path: Output path requested on the command line
+        input_paths: Paths of the input transcripts
         
-        # If the API call failed or returned no results, fall back to simulation
-        if not extracted_fields:
-            print("No fields extracted from API. Falling back to simulation mode.")
-            extracted_fields = simulate_extraction(transcript_text)
-    except Exception as e:
-        print(f"Error extracting fields: {str(e)}")
-        print("Falling back to simulation mode.")
-        extracted_fields = simulate_extraction(transcript_text)
+    Returns:
+        List of output paths, one per input
+    """
+    if len(input_paths) == 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    stems = [Path(input_path).stem for input_path in input_paths]
+    repeated = {stem for stem in stems if stems.count(stem) > 1}
+    names = [f"{stem}_{index}" if stem in repeated else stem for index, stem in enumerate(stems, 1)]
+    if len(set(names)) < len(names):
+        # A numbered name clashes with another input's stem - number every output
+        names = [f"{index}_{stem}" for index, stem in enumerate(stems, 1)]
+    return [f"{root}_{name}{ext}" for name in names]
+
+
+def save_and_fill(extracted_fields: List[Dict[str, Any]], output_path: str, json_output: str = None) -> int:
+    """
+    Save the extracted fields to JSON if requested and fill the PDF with them
     
+    Args:
+        extracted_fields: List of dictionaries with field_name, value, and confidence
+        output_path: Path to save the filled PDF
+        json_output: Optional path to save the extracted JSON data
+        
+    Returns:
+        int: Exit code (0 on success)
+    """
     # Save the extracted fields to JSON if requested
-    if args.json_output:
+    if json_output:
         try:
-            with open(args.json_output, 'w') as f:
-                json.dump(extracted_fields, f, indent=2)
-            print(f"Saved extracted fields to {args.json_output}")
+            if _HAS_ORJSON:
+                with open(json_output, 'wb') as f:
+                    f.write(orjson.dumps(extracted_fields, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_output, 'w') as f:
+                    json.dump(extracted_fields, f, indent=2)
+            print(f"Saved extracted fields to {json_output}")
         except Exception as e:
             print(f"Error saving extracted fields to JSON: {str(e)}")
     
@@ -560,7 +727,7 @@ def main():
         for field in extracted_fields:
             print(f"  {field['field_name']}: {field['value']} (confidence: {field['confidence']}%)")
         
-        filled_pdf_path = fill_pdf_with_extracted_data(extracted_fields, args.output)
+        filled_pdf_path = fill_pdf_with_extracted_data(extracted_fields, output_path)
         print(f"Successfully filled PDF and saved to {filled_pdf_path}")
     else:
         print("No fields were extracted from the transcript")
@@ -569,5 +736,60 @@ def main():
     return 0
 
 
+def main():
+    """Main function"""
+    args = parse_command_line()
+    
+    # Read input transcripts
+    transcripts = []
+    for input_path in args.input:
+        try:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                transcripts.append(f.read())
+        except FileNotFoundError:
+            print(f"Error: Input file not found at {input_path}")
+            return 1
+    
+    # Read the field guide
+    field_guide = read_field_guide()
+    
+    # Extract fields from the transcripts, with concurrent requests when there are several
+    try:
+        if len(transcripts) == 1:
+            results = [extract_fields_with_gemma(transcripts[0], field_guide)]
+        else:
+            results = extract_fields_with_gemma_concurrent(transcripts, field_guide)
+    except Exception as e:
+        print(f"Error extracting fields: {str(e)}")
+        results = [[] for _ in transcripts]
+    
+    # If the API call failed or returned no results, fall back to simulation
+    fallback = [index for index, extracted_fields in enumerate(results) if not extracted_fields]
+    for _ in fallback:
+        print("No fields extracted from API. Falling back to simulation mode.")
+    fallback_transcripts = [transcripts[index] for index in fallback]
+    workers = min(len(fallback), os.cpu_count() or 1)
+    if workers > 1 and len(fallback) >= _PARALLEL_MIN_TRANSCRIPTS:
+        # Each transcript is independent, so spread the pure-Python regex work across cores
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            simulated = list(executor.map(simulate_extraction, fallback_transcripts,
+                                          chunksize=max(1, len(fallback) // (8 * workers))))
+    else:
+        simulated = [simulate_extraction(transcript_text) for transcript_text in fallback_transcripts]
+    for index, extracted_fields in zip(fallback, simulated):
+        results[index] = extracted_fields
+    
+    multiple_inputs = len(transcripts) > 1
+    output_paths = output_paths_for_inputs(args.output, args.input)
+    json_outputs = output_paths_for_inputs(args.json_output, args.input) if args.json_output else [None] * len(args.input)
+    exit_code = 0
+    for input_path, extracted_fields, output_path, json_output in zip(args.input, results, output_paths, json_outputs):
+        if multiple_inputs:
+            print(f"\n=== {input_path} ===")
+        exit_code |= save_and_fill(extracted_fields, output_path, json_output)
+    
+    return exit_code
+
+
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
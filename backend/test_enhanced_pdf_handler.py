@@ -0,0 +1,169 @@
+"""
+Tests for filling and flattening AcroForms in enhanced_pdf_handler.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject, NumberObject,
+    TextStringObject
+)
+
+import enhanced_pdf_handler
+from enhanced_pdf_handler import PDFFiller
+
+
+def _rect(x1, y1, x2, y2):
+    return ArrayObject([FloatObject(value) for value in (x1, y1, x2, y2)])
+
+
+def _appearance(writer, data):
+    """Add a 10x10 form XObject drawing the given content"""
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    stream.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Form'),
+        NameObject('/BBox'): _rect(0, 0, 10, 10),
+    })
+    return writer._add_object(stream)
+
+
+def _widget(page, rect, **entries):
+    widget = DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'),
+        NameObject('/Subtype'): NameObject('/Widget'),
+        NameObject('/Rect'): _rect(*rect),
+        NameObject('/F'): NumberObject(4),
+        NameObject('/P'): page.indirect_reference,
+    })
+    widget.update({NameObject(f'/{key}'): value for key, value in entries.items()})
+    return widget
+
+
+def _button_states(writer, state):
+    return DictionaryObject({NameObject('/N'): DictionaryObject({
+        NameObject(state): _appearance(writer, b'0 0 0 rg 0 0 10 10 re f'),
+        NameObject('/Off'): _appearance(writer, b''),
+    })})
+
+
+def build_form(path):
+    """
+    Write a two-page AcroForm: text fields 'name' and 'borrower.city' on the first page,
+    checkbox 'agree' and radio group 'choice' (options A and B) on the second
+    """
+    writer = PdfWriter()
+    first_page = writer.add_blank_page(612, 792)
+    second_page = writer.add_blank_page(612, 792)
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for page in (first_page, second_page):
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/Helv'): font})
+        })
+    text_style = TextStringObject('/Helv 12 Tf 0 g')
+
+    name = writer._add_object(_widget(
+        first_page, (100, 700, 400, 720), FT=NameObject('/Tx'), T=TextStringObject('name'), DA=text_style
+    ))
+
+    # Hierarchical text field: the widget is the kid 'city' of the non-terminal field 'borrower'
+    borrower = writer._add_object(DictionaryObject({NameObject('/T'): TextStringObject('borrower')}))
+    city = writer._add_object(_widget(
+        first_page, (100, 650, 400, 670), FT=NameObject('/Tx'), T=TextStringObject('city'), DA=text_style,
+        Parent=borrower
+    ))
+    borrower.get_object()[NameObject('/Kids')] = ArrayObject([city])
+
+    agree = writer._add_object(_widget(
+        second_page, (100, 600, 110, 610), FT=NameObject('/Btn'), T=TextStringObject('agree'),
+        V=NameObject('/Off'), AS=NameObject('/Off'), AP=_button_states(writer, '/Yes')
+    ))
+
+    # Radio group: /FT lives on the parent, each kid widget carries one option
+    choice = writer._add_object(DictionaryObject({
+        NameObject('/FT'): NameObject('/Btn'),
+        NameObject('/T'): TextStringObject('choice'),
+        NameObject('/Ff'): NumberObject(1 << 15),
+        NameObject('/V'): NameObject('/Off'),
+    }))
+    options = ArrayObject([
+        writer._add_object(_widget(
+            second_page, (100 + 20 * index, 500, 110 + 20 * index, 510), Parent=choice,
+            AS=NameObject('/Off'), AP=_button_states(writer, f'/{option}')
+        ))
+        for index, option in enumerate(('A', 'B'))
+    ])
+    choice.get_object()[NameObject('/Kids')] = options
+
+    first_page[NameObject('/Annots')] = ArrayObject([name, city])
+    second_page[NameObject('/Annots')] = ArrayObject([agree, *options])
+    writer._root_object[NameObject('/AcroForm')] = DictionaryObject({
+        NameObject('/Fields'): ArrayObject([name, borrower, agree, choice]),
+        NameObject('/DA'): TextStringObject('/Helv 0 Tf 0 g'),
+        NameObject('/DR'): DictionaryObject({NameObject('/Font'): DictionaryObject({NameObject('/Helv'): font})}),
+    })
+    with open(path, 'wb') as output:
+        writer.write(output)
+
+
+class FillAndFlattenTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.template_path = os.path.join(self.directory.name, 'form.pdf')
+        self.output_path = os.path.join(self.directory.name, 'filled.pdf')
+        build_form(self.template_path)
+        # Exercise the pypdf flattening path whichever optional backend is installed
+        patcher = mock.patch.object(enhanced_pdf_handler, '_PDF_BACKEND', 'pypdf')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fill(self, flatten):
+        PDFFiller(self.template_path).fill_form({
+            'name': 'Jane Doe',
+            'borrower.city': 'Springfield',
+            'agree': True,
+            'choice': 'B',
+        }, self.output_path, flatten=flatten)
+        return PdfReader(self.output_path)
+
+    def test_fill_sets_field_values(self):
+        fields = self.fill(flatten=False).get_fields()
+        self.assertEqual(fields['name'].get('/V'), 'Jane Doe')
+        self.assertEqual(fields['borrower.city'].get('/V'), 'Springfield')
+        self.assertEqual(fields['agree'].get('/V'), '/Yes')
+        self.assertEqual(fields['choice'].get('/V'), '/B')
+
+    def test_flatten_draws_values_and_removes_the_form(self):
+        reader = self.fill(flatten=True)
+        self.assertEqual(len(reader.pages), 2)
+        self.assertNotIn('/AcroForm', reader.trailer['/Root'])
+        for page in reader.pages:
+            self.assertNotIn('/Annots', page)
+
+        first_page_text = reader.pages[0].extract_text()
+        self.assertIn('Jane Doe', first_page_text)
+        self.assertIn('Springfield', first_page_text)
+
+        # The second page draws the selected checkbox and radio states, one XObject per widget
+        second_page = reader.pages[1]
+        xobjects = second_page['/Resources']['/XObject']
+        drawn = [xobject.get_object().get_data() for xobject in xobjects.values()]
+        self.assertEqual(len(drawn), 3)
+        self.assertEqual(drawn.count(b'0 0 0 rg 0 0 10 10 re f'), 2)
+        content = second_page.get_contents().get_data()
+        for name in xobjects:
+            self.assertIn(f'{name} Do'.encode('ascii'), content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests for the pattern extraction in extract_transcript_fields.py
+"""
+
+import os
+import re
+import unittest
+from unittest import mock
+
+import extract_transcript_fields as extractor
+
+SAMPLE_TRANSCRIPT_PATH = os.path.join(os.path.dirname(__file__), '..', 'test_transcript_with_coapplicant.txt')
+
+SNIPPETS = [
+    "My name is John Smith and my email is john.smith@example.com.",
+    "MY PHONE NUMBER IS 555-123-4567, my   email   is  JANE@EXAMPLE.COM",
+    "SSN 123-00-1234 and 987-00-5678 ok",
+    "The house was built in 1962. It is a 2-unit building, and I'll use the property as a primary residence.",
+    "I'd like a 30 year fixed loan for $350,000. My annual income is $120,000.",
+    "I work at Acme Corp as a Senior Engineer. I live at 12 Main Street, Austin, TX 78701.",
+    "Nothing to see here.",
+]
+
+
+def _reference_extraction(transcript):
+    """Run every pattern case-insensitively on the cleaned text, without any prefiltering"""
+    clean_transcript = extractor.clean_text(transcript)
+    extracted = {}
+    for field_type, patterns in extractor.COMMON_FIELDS.items():
+        values = []
+        for pattern in patterns:
+            compiled = re.compile(pattern, re.IGNORECASE)
+            for match in compiled.finditer(clean_transcript):
+                values.append(match.group(1 if compiled.groups else 0).strip())
+        if values:
+            extracted[field_type] = values
+    return extracted
+
+
+def _values(transcript):
+    return {
+        field_type: [match.field_value for match in matches]
+        for field_type, matches in extractor.extract_field_value_pairs(transcript).items()
+    }
+
+
+def _flat(transcript):
+    return {field['field_name']: field['field_value'] for field in extractor.extract_to_flat_list(transcript)}
+
+
+class ExtractionTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(SAMPLE_TRANSCRIPT_PATH, 'r', encoding='utf-8') as transcript_file:
+            cls.transcripts = [transcript_file.read()] + SNIPPETS
+
+    def test_matches_unfiltered_case_insensitive_scan(self):
+        for transcript in self.transcripts:
+            with self.subTest(transcript=transcript[:40]):
+                self.assertEqual(_values(transcript), _reference_extraction(transcript))
+
+    def test_flat_list_keeps_first_match_of_each_field(self):
+        for transcript in self.transcripts:
+            with self.subTest(transcript=transcript[:40]):
+                expected = {field_type: values[0] for field_type, values in _reference_extraction(transcript).items()}
+                self.assertEqual(_flat(transcript), expected)
+
+    def test_sample_transcript_flat_list(self):
+        flat_list = extractor.extract_to_flat_list(self.transcripts[0])
+        self.assertEqual(len(flat_list), 28)
+        fields = {field['field_name']: field['field_value'] for field in flat_list}
+        self.assertEqual(fields['phone'], '469-555-0011')
+        self.assertEqual(fields['social_security'], '123-00-1234')
+        self.assertEqual(fields['date_of_birth'], 'October 27, 1990')
+        self.assertEqual(fields['loan_amount'], '360,000')
+        self.assertEqual(fields['year_built'], '2005')
+        self.assertEqual(fields['estate_type'], 'Fee Simple')
+        self.assertTrue(all(field['confidence_score'] == 0.7 for field in flat_list))
+
+    def test_values_keep_original_case_and_spans_point_into_cleaned_text(self):
+        transcript = SNIPPETS[1]
+        clean_transcript = extractor.clean_text(transcript)
+        self.assertEqual(set(_values(transcript)['email']), {'JANE@EXAMPLE.COM'})
+        for matches in extractor.extract_field_value_pairs(transcript).values():
+            for match in matches:
+                start, end = match.span
+                self.assertIn(match.field_value, clean_transcript[start:end])
+
+    def test_clean_text_standardizes_spoken_forms(self):
+        self.assertEqual(
+            extractor.clean_text("  my NAME is Ann,\n my phone number is 1 and MY EMAIL IS x "),
+            "My name is Ann, My phone is 1 and My email is x"
+        )
+
+    def test_without_the_pattern_parser_every_pattern_runs(self):
+        with mock.patch.object(extractor, 'sre_parse', None):
+            self.assertIsNone(extractor._pattern_triggers(extractor._LOWERED_FIELDS['email'][0]))
+        unfiltered_triggers = {field_type: [None] * len(triggers) for field_type, triggers in extractor._PATTERN_TRIGGERS.items()}
+        with mock.patch.object(extractor, '_PATTERN_TRIGGERS', unfiltered_triggers), \
+                mock.patch.object(extractor, '_candidate_fields', lambda lowered: set(extractor.COMMON_FIELDS)):
+            for transcript in self.transcripts:
+                with self.subTest(transcript=transcript[:40]):
+                    self.assertEqual(_values(transcript), _reference_extraction(transcript))
+
+
+class YearBuiltTests(unittest.TestCase):
+    def test_merged_entry_appends_the_construction_pattern(self):
+        patterns = extractor.COMMON_FIELDS['year_built']
+        self.assertEqual(len(patterns), 4)
+        self.assertEqual(patterns[-1], r"(?:built|construction|year built)(?:\s+in|\s+date)?:?\s+(\d{4})")
+
+    def test_built_in_is_still_the_best_match(self):
+        self.assertEqual(_flat("The house was built in 1962, construction 1987.")['year_built'], '1962')
+        self.assertEqual(_flat("Year built is 2001.")['year_built'], '2001')
+
+    def test_construction_forms_from_the_merged_list_are_found(self):
+        self.assertEqual(_flat("Construction: 1987")['year_built'], '1987')
+        self.assertEqual(_flat("construction in 1987")['year_built'], '1987')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests for field name normalization, categorization and mapping in field_mapping_generator.py
+"""
+
+import difflib
+import os
+import re
+import tempfile
+import unittest
+
+import field_mapping_generator as generator
+from test_enhanced_pdf_handler import build_form
+
+FIELD_NAMES = [
+    '', 'name', 'email', 'phone', 'city', 'zzz',
+    'form_first_name', 'field_loan_amount_value', 'txt_Phone__Number', 'chk_box_text_input',
+    'Borrower First Name', 'Co-Borrower SSN', 'Subject Property Address', 'Loan Amount $',
+    'Property City (if different from current, or for purchase)', 'Date of Birth (mm/dd/yyyy)',
+    'Employer Name & Address', 'Base Monthly Income', 'E-mail', 'Cell Phone #', 'Year Built',
+    'current_street', 'social_security', 'annual_income', 'year_built', 'property_use', 'estate_type',
+]
+
+
+def _reference_normalize(field_name):
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9]', ' ', field_name.lower())).strip()
+
+
+def _reference_patterns(field_name):
+    normalized = _reference_normalize(field_name)
+    related_terms = {normalized}
+    related_terms.update(word for word in normalized.split() if len(word) > 2)
+    for pattern, terms in generator.FIELD_PATTERNS.items():
+        if re.search(pattern, normalized):
+            related_terms.update(terms)
+    return related_terms
+
+
+def _reference_similarity(source, target):
+    source_norm = _reference_normalize(source)
+    target_norm = _reference_normalize(target)
+    if source_norm == target_norm:
+        return 1.0
+    seq_ratio = difflib.SequenceMatcher(None, source_norm, target_norm).ratio()
+    source_words, target_words = set(source_norm.split()), set(target_norm.split())
+    word_overlap = len(source_words & target_words) / max(len(source_words), len(target_words)) if source_words and target_words else 0
+    source_patterns, target_patterns = _reference_patterns(source), _reference_patterns(target)
+    pattern_overlap = len(source_patterns & target_patterns) / max(len(source_patterns), len(target_patterns)) if source_patterns and target_patterns else 0
+    return min(seq_ratio * 0.3 + word_overlap * 0.3 + pattern_overlap * 0.4, 1.0)
+
+
+def _reference_transcript_category(field_name):
+    norm_field = field_name.lower().strip()
+    for category, synonyms in generator.FIELD_CATEGORIES.items():
+        for synonym in synonyms:
+            if synonym in norm_field or norm_field in synonym:
+                return category
+    return 'other'
+
+
+def _reference_pdf_category(field_name):
+    norm_field = field_name.lower().strip()
+    for category, patterns in generator.CATEGORY_TO_PDF_PATTERNS.items():
+        if any(re.search(pattern, norm_field) for pattern in patterns):
+            return category
+    return 'other'
+
+
+class NormalizationTests(unittest.TestCase):
+    def test_keeps_prefix_and_suffix_words(self):
+        self.assertEqual(generator.normalize_field_name('form_first_name'), 'form first name')
+        self.assertEqual(generator.normalize_field_name('field_loan_amount_value'), 'field loan amount value')
+        self.assertEqual(generator.normalize_field_name('  Cell Phone #  '), 'cell phone')
+
+    def test_matches_reference(self):
+        for field_name in FIELD_NAMES:
+            with self.subTest(field_name=field_name):
+                self.assertEqual(generator.normalize_field_name(field_name), _reference_normalize(field_name))
+                self.assertEqual(generator.get_field_patterns(field_name), _reference_patterns(field_name))
+
+    def test_similarity_matches_reference(self):
+        for source in FIELD_NAMES:
+            for target in FIELD_NAMES:
+                with self.subTest(source=source, target=target):
+                    self.assertAlmostEqual(
+                        generator.calculate_similarity(source, target), _reference_similarity(source, target)
+                    )
+
+
+class CategorizationTests(unittest.TestCase):
+    def test_transcript_categories_match_reference(self):
+        for field_name in FIELD_NAMES:
+            with self.subTest(field_name=field_name):
+                self.assertEqual(generator.categorize_transcript_field(field_name), _reference_transcript_category(field_name))
+
+    def test_pdf_categories_match_reference(self):
+        for field_name in FIELD_NAMES:
+            with self.subTest(field_name=field_name):
+                self.assertEqual(generator.categorize_pdf_field(field_name), _reference_pdf_category(field_name))
+
+    def test_categorization_is_cached(self):
+        generator.categorize_transcript_field('Borrower First Name')
+        self.assertGreater(generator.categorize_transcript_field.cache_info().currsize, 0)
+
+
+class GenerateMappingTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_path = os.path.join(directory.name, 'form.pdf')
+        build_form(self.pdf_path)
+
+    def test_coverage_counts_every_transcript_field(self):
+        transcript_fields = ['name', 'name', 'city', 'email', 'zzz', 'name']
+        result = generator.generate_field_mapping(self.pdf_path, transcript_fields)
+        details = result['details']
+        statistics = details['coverage_statistics']
+
+        self.assertEqual(result['mapping'], {'name': 'name', 'city': 'borrower.city'})
+        self.assertEqual(details['total_transcript_fields'], 6)
+        self.assertEqual(details['deduplication']['unique_transcript_fields'], 4)
+        self.assertEqual(statistics['mapped_fields'] + statistics['unmapped_fields'], details['total_transcript_fields'])
+        self.assertEqual(statistics['mapped_fields'], 4)
+        self.assertEqual(statistics['unmapped_transcript_fields'], ['email', 'zzz'])
+        self.assertEqual(statistics['coverage_percent'], 66.67)
+        self.assertEqual(set(details['mappings']), {'name', 'city'})
+
+
+if __name__ == '__main__':
+    unittest.main()
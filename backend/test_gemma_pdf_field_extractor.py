@@ -0,0 +1,38 @@
+"""
+Tests for the regex fallback extraction in gemma_pdf_field_extractor.py
+"""
+
+import unittest
+
+import gemma_pdf_field_extractor as extractor
+
+
+def _extracted(transcript_text):
+    """Map each extracted field name to its value"""
+    return {field["field_name"]: field["value"] for field in extractor.simulate_extraction(transcript_text)}
+
+
+class SimulateExtractionTests(unittest.TestCase):
+    def test_dob_with_four_letter_month_is_not_read_as_year_first(self):
+        fields = _extracted("My date of birth is June 15, 1990.")
+        self.assertEqual(fields["Borrower DOB"], "1990-June-15")
+        self.assertEqual(_extracted("I was born on July 4, 1985.")["Borrower DOB"], "1985-July-04")
+        self.assertEqual(_extracted("My date of birth is 1990-06-15.")["Borrower DOB"], "1990-06-15")
+        self.assertEqual(_extracted("My date of birth is 6/15/1990.")["Borrower DOB"], "1990-06-15")
+
+
+class OutputPathTests(unittest.TestCase):
+    def test_single_input_keeps_the_requested_path(self):
+        self.assertEqual(extractor.output_paths_for_inputs("out/filled.pdf", ["a/t.txt"]), ["out/filled.pdf"])
+
+    def test_same_stem_from_different_directories_does_not_collide(self):
+        paths = extractor.output_paths_for_inputs("out/filled.pdf", ["a/t.txt", "b/t.txt", "c/u.txt"])
+        self.assertEqual(paths, ["out/filled_t_1.pdf", "out/filled_t_2.pdf", "out/filled_u.pdf"])
+
+    def test_numbered_name_clashing_with_another_stem_numbers_every_output(self):
+        paths = extractor.output_paths_for_inputs("out/filled.pdf", ["a/t.txt", "b/t.txt", "t_1.txt"])
+        self.assertEqual(len(set(paths)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()